@@ -0,0 +1,195 @@
+"""
+Content-addressed on-disk cache for synthesized voice replies.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class AudioCache:
+    def __init__(self, cache_dir: str = "tts_cache", max_bytes: int = 100 * 1024 * 1024, extension: str = "mp3"):
+        """
+        Initialize a size-bounded LRU audio cache.
+
+        Args:
+            cache_dir (str): Directory holding cached audio files
+            max_bytes (int): Total size of cached audio before LRU eviction
+            extension (str): File extension of cached audio
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+
+        # Telegram file_ids of already uploaded audio, so repeats skip the upload too
+        self._file_ids_path = os.path.join(cache_dir, "file_ids.json")
+        self._file_ids: Dict[str, str] = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, language: str) -> str:
+        """Content address for a piece of advice spoken in a given voice language"""
+        return hashlib.sha256(f"{language}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        suffix = f".{self.extension}"
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(suffix):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                files.append((stat.st_mtime, name[:-len(suffix)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+
+        try:
+            if os.path.exists(self._file_ids_path):
+                with open(self._file_ids_path, 'r', encoding='utf-8') as f:
+                    self._file_ids = {k: v for k, v in json.load(f).items() if k in self._entries}
+        except Exception as e:
+            logger.error(f"Error loading cached file ids: {e}")
+
+        logger.info(f"Audio cache has {len(self._entries)} entries ({self.total_bytes} bytes)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read cached audio.
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            Optional[bytes]: Audio data or None on a miss
+        """
+        with self.lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+                os.utime(self._path(key))  # persist recency across restarts
+            except OSError as e:
+                logger.warning(f"Dropping unreadable audio cache entry {key}: {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        """get() for the event loop: misses return directly, file reads run in a thread"""
+        with self.lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+        return await asyncio.to_thread(self.get, key)
+
+    def put(self, key: str, data: bytes):
+        """
+        Store audio, evicting the least recently used entries to stay under max_bytes.
+
+        Args:
+            key (str): Key from make_key
+            data (bytes): Audio to cache
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        with self.lock:
+            temp_path = self._path(key) + ".tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, self._path(key))
+            except OSError as e:
+                logger.error(f"Error writing audio cache entry: {e}")
+                return
+
+            self.total_bytes += len(data) - self._entries.get(key, 0)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+
+            evicted = False
+            while self.total_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                evicted = True
+
+            if evicted:
+                self._save_file_ids()
+
+    async def put_async(self, key: str, data: bytes):
+        """put() for the event loop: the file write and any eviction run in a thread"""
+        await asyncio.to_thread(self.put, key, data)
+
+    def _remove(self, key: str):
+        """Delete an entry and its file; caller holds the lock"""
+        self.total_bytes -= self._entries.pop(key, 0)
+        self._file_ids.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def get_file_id(self, key: str) -> Optional[str]:
+        """Telegram file_id of an earlier upload of this audio, if any"""
+        with self.lock:
+            return self._file_ids.get(key)
+
+    def set_file_id(self, key: str, file_id: str):
+        """Remember the Telegram file_id returned after uploading this audio"""
+        with self.lock:
+            if key not in self._entries or self._file_ids.get(key) == file_id:
+                return
+            self._file_ids[key] = file_id
+            self._save_file_ids()
+
+    async def set_file_id_async(self, key: str, file_id: str):
+        """set_file_id() for the event loop: the file_id map is rewritten in a thread"""
+        await asyncio.to_thread(self.set_file_id, key, file_id)
+
+    def _save_file_ids(self):
+        """Persist the file_id map atomically; caller holds the lock"""
+        temp_path = self._file_ids_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._file_ids, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._file_ids_path)
+        except OSError as e:
+            logger.error(f"Error saving cached file ids: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current cache size"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "file_ids": len(self._file_ids)
+            }
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the Telegram Health Chatbot.
+
+Run from the repository root, e.g. ``python -m benchmarks.gemini_concurrency``.
+"""
@@ -0,0 +1,84 @@
+"""
+Temp-file vs in-memory voice pipeline.
+
+Runs the transcription and TTS paths of ``VoiceProcessor`` both ways with the
+network calls (Google STT and gTTS) stubbed out, so the difference measured
+is decoding plus disk round-trips. Requires ffmpeg for OGG decoding.
+
+    python -m benchmarks.audio_pipeline --ogg sample.ogg --iterations 50
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import tts_engines
+from benchmarks.fakes import FakeTTS, speech_like_audio
+from voice_processor import VoiceProcessor
+
+def _make_sample(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    speech_like_audio(seconds).export(buffer, format="ogg", codec="libopus")
+    return buffer.getvalue()
+
+async def _transcribe_via_files(processor: VoiceProcessor, ogg_data: bytes) -> str:
+    # Mirrors download_to_drive + transcribe_voice in the bot
+    with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_file:
+        temp_file.write(ogg_data)
+        path = temp_file.name
+    try:
+        return await processor.transcribe_voice(path, 'en-US')
+    finally:
+        os.unlink(path)
+
+async def _tts_via_files(processor: VoiceProcessor, text: str) -> bytes:
+    path = await processor.text_to_speech(text, 'en')
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+async def _measure(label: str, factory, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await factory()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:>24}: mean {statistics.mean(timings):7.2f} ms, "
+          f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:7.2f} ms")
+
+async def _run(ogg_data: bytes, iterations: int):
+    # FakeTTS returns placeholder MP3 bytes, which cannot be transcoded to Opus
+    os.environ.setdefault("TTS_FORMAT", "mp3")
+    processor = VoiceProcessor()
+    processor.recognizer.recognize_google = lambda audio, language: "I have fever"
+    tts_engines.gTTS = FakeTTS
+    advice = "Drink fluids and rest. " * 20
+    
+    await _measure("transcribe (temp files)", lambda: _transcribe_via_files(processor, ogg_data), iterations)
+    await _measure("transcribe (in memory)", lambda: processor.transcribe_voice_bytes(ogg_data, 'en-US'), iterations)
+    await _measure("tts (temp files)", lambda: _tts_via_files(processor, advice), iterations)
+    await _measure("tts (in memory)", lambda: processor.text_to_speech_bytes(advice, 'en'), iterations)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ogg", help="OGG voice note to use (default: generated 5 s of tone bursts)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of the generated speech-like audio")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    
+    if args.ogg:
+        with open(args.ogg, 'rb') as f:
+            ogg_data = f.read()
+    else:
+        ogg_data = _make_sample(args.seconds)
+    
+    asyncio.run(_run(ogg_data, args.iterations))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+End-to-end load test of the whole intake flow against local fakes.
+
+Runs ``HealthChatBot`` in this process against fake Telegram Bot API, Gemini,
+Google speech recognition and gTTS servers with configurable latency. The
+real Gemini, SpeechRecognition and gTTS clients are used, pointed at the
+fakes. --users simulated users arrive over --ramp-up seconds and each walks
+the LANGUAGE→NAME→AGE→PHONE→GENDER→SYMPTOMS flow, sending the next update
+only once the bot's reply to the previous one has arrived.
+
+Reports throughput, p50/p95/p99 latency of intake replies, of the
+symptoms→"Consultation completed" step and of whole sessions, mean time per
+pipeline stage (from the metrics registry) and peak RSS. RSS covers the whole
+process, fakes included. Other bot settings (CONCURRENT_UPDATES,
+ADVICE_STREAMING, ...) are read from the environment as usual. Voice users
+(--voice-ratio) and OGG/Opus voice replies (--tts-format ogg, the default
+when ffmpeg is installed) need ffmpeg.
+
+    python -m benchmarks.end_to_end --users 2000 --ramp-up 20 --gemini-latency 1.5
+    python -m benchmarks.end_to_end --users 2000 --output baseline.json
+    python -m benchmarks.end_to_end --users 2000 --baseline baseline.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import math
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from telegram import Update
+
+from benchmarks.fakes import (
+    FakeGeminiServer, FakeGoogleTTSServer, FakeSpeechServer, FakeTelegramServer, gtts_like_mp3, intake_flow,
+    speech_like_audio
+)
+from benchmarks.replay_updates import EXPECTED_FLOW
+
+# Results compared against --baseline: name -> whether higher values are better
+REGRESSION_CHECKS = {
+    "consultations_per_s": True,
+    "intake_p95_s": False,
+    "consultation_p95_s": False,
+    "session_p95_s": False,
+    "peak_rss_mb": False
+}
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(p / 100 * len(ordered))) - 1]
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _make_voice_note(seconds: float = 3.0) -> bytes:
+    buffer = io.BytesIO()
+    speech_like_audio(seconds).export(buffer, format="ogg", codec="libopus")
+    return buffer.getvalue()
+
+async def _wait_for_reply(inbox: asyncio.Queue, marker: str, timeout: float) -> bool:
+    """Consume the bot's messages until one contains marker"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return False
+        try:
+            text = await asyncio.wait_for(inbox.get(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return False
+        if marker in text:
+            return True
+
+async def _simulate_user(application, user_id: int, voice: bool, inbox: asyncio.Queue,
+                         args, results: Dict[str, list]):
+    await asyncio.sleep(random.uniform(0, args.ramp_up))
+    session_started = time.perf_counter()
+
+    flow = intake_flow(user_id, voice=voice)
+    for step, (data, marker) in enumerate(zip(flow, EXPECTED_FLOW)):
+        if step and args.think_time:
+            await asyncio.sleep(random.expovariate(1 / args.think_time))
+
+        sent = time.perf_counter()
+        await application.update_queue.put(Update.de_json(data, application.bot))
+        if not await _wait_for_reply(inbox, marker, args.step_timeout):
+            results["failed"].append(user_id)
+            return
+
+        stage = "consultation" if step == len(flow) - 1 else "intake"
+        results[stage].append(time.perf_counter() - sent)
+
+    results["session"].append(time.perf_counter() - session_started)
+
+def _stage_means() -> Dict[str, Dict[str, float]]:
+    import metrics
+    registry = metrics.get_registry()
+    stages = {}
+    for labels, histogram in registry.histograms.get("stage_duration_seconds", {}).items():
+        if histogram.count:
+            stages[dict(labels)["stage"]] = {"count": histogram.count, "mean_s": histogram.sum / histogram.count}
+    return stages
+
+async def _run(args, telegram: FakeTelegramServer) -> dict:
+    from bot import HealthChatBot
+
+    bot = HealthChatBot("123456:FAKE")
+    application = bot.application
+    loop = asyncio.get_running_loop()
+
+    user_ids = [100_000 + i for i in range(args.users)]
+    inboxes = {user_id: asyncio.Queue() for user_id in user_ids}
+
+    def deliver(chat_id: int, text: str):
+        inbox = inboxes.get(chat_id)
+        if inbox is not None:
+            inbox.put_nowait(text)
+
+    telegram.listener = lambda chat_id, text: loop.call_soon_threadsafe(deliver, chat_id, text)
+
+    rng = random.Random(args.seed)
+    voice_users = {user_id for user_id in user_ids if rng.random() < args.voice_ratio}
+    results: Dict[str, list] = {"intake": [], "consultation": [], "session": [], "failed": []}
+
+    await application.initialize()
+    await application.start()
+    rss_before = _peak_rss_mb()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _simulate_user(application, user_id, user_id in voice_users, inboxes[user_id], args, results)
+        for user_id in user_ids
+    ))
+    elapsed = time.perf_counter() - started
+
+    telegram.listener = None
+    await application.stop()
+    await application.shutdown()
+    bot.data_manager.close()
+    bot.voice_processor.close()
+
+    completed = len(results["session"])
+    return {
+        "users": args.users,
+        "voice_users": len(voice_users),
+        "completed": completed,
+        "failed": len(results["failed"]),
+        "elapsed_s": elapsed,
+        "consultations_per_s": completed / elapsed,
+        "updates_per_s": (len(results["intake"]) + len(results["consultation"])) / elapsed,
+        **{f"{name}_{p}_s": percentile(results[name], int(p[1:]))
+           for name in ("intake", "consultation", "session") for p in ("p50", "p95", "p99")},
+        "startup_rss_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": _stage_means()
+    }
+
+def _report(result: dict):
+    print(f"{result['completed']}/{result['users']} sessions completed ({result['voice_users']} voice, "
+          f"{result['failed']} failed) in {result['elapsed_s']:.2f}s")
+    print(f"throughput: {result['consultations_per_s']:.1f} consultations/s, {result['updates_per_s']:.0f} updates/s")
+    print(f"{'latency (s)':>14} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name in ("intake", "consultation", "session"):
+        print(f"{name:>14} {result[f'{name}_p50_s']:>8.3f} {result[f'{name}_p95_s']:>8.3f} "
+              f"{result[f'{name}_p99_s']:>8.3f}")
+    print(f"peak RSS: {result['peak_rss_mb']:.0f} MB (after startup: {result['startup_rss_mb']:.0f} MB)")
+    print(f"{'stage':>22} {'count':>7} {'mean ms':>9}")
+    for stage, summary in sorted(result["stages"].items()):
+        print(f"{stage:>22} {summary['count']:>7} {summary['mean_s'] * 1000:>9.1f}")
+
+def _regressions(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Checks that got worse than baseline by more than tolerance (a fraction)"""
+    failures = []
+    for name, higher_is_better in REGRESSION_CHECKS.items():
+        before, after = baseline.get(name), result.get(name)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if (-change if higher_is_better else change) > tolerance:
+            failures.append(f"{name}: {before:.3f} -> {after:.3f} ({change:+.0%})")
+    return failures
+
+def main() -> Optional[int]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which users arrive")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's messages")
+    parser.add_argument("--voice-ratio", type=float, default=0.0, help="Share of users sending a voice note")
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--stt-latency", type=float, default=0.5)
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Per gTTS request (~100 characters)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter for Gemini, STT and TTS")
+    parser.add_argument("--warm-caches", action="store_true", help="Keep the Gemini and TTS caches and request coalescing enabled")
+    parser.add_argument("--data-backend", default="jsonl", choices=("json", "jsonl", "sqlite"))
+    parser.add_argument("--tts-format", choices=("ogg", "mp3"),
+                        default="ogg" if shutil.which("ffmpeg") else "mp3", help="TTS_FORMAT")
+    parser.add_argument("--step-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(args.seed)
+
+    voice_data = b""
+    if args.voice_ratio > 0:
+        if shutil.which("ffmpeg") is None:
+            parser.error("--voice-ratio needs ffmpeg to encode and decode voice notes")
+        voice_data = _make_voice_note()
+    if args.tts_format == "ogg" and shutil.which("ffmpeg") is None:
+        parser.error("--tts-format ogg needs ffmpeg to transcode voice replies")
+    tts_payload = gtts_like_mp3() if args.tts_format == "ogg" else b""
+
+    workdir = tempfile.mkdtemp(prefix="end_to_end_")
+    extension = {"json": "json", "jsonl": "jsonl", "sqlite": "db"}[args.data_backend]
+
+    with FakeTelegramServer(latency=args.telegram_latency, voice_data=voice_data) as telegram, \
+            FakeGeminiServer(latency=args.gemini_latency, jitter=args.jitter) as gemini, \
+            FakeSpeechServer(latency=args.stt_latency, jitter=args.jitter) as speech, \
+            FakeGoogleTTSServer(latency=args.tts_latency, jitter=args.jitter, payload=tts_payload) as tts:
+        tts.install()
+        os.environ.update({
+            "TELEGRAM_BASE_URL": telegram.url,
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": gemini.url,
+            "STT_ENDPOINT": speech.endpoint,
+            "METRICS_ENABLED": "1",
+            "DATA_BACKEND": args.data_backend,
+            "TTS_FORMAT": args.tts_format,
+            "DATA_FILE": os.path.join(workdir, f"users.{extension}"),
+            "PERSISTENCE_PATH": os.path.join(workdir, "bot_state.db"),
+            "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache")
+        })
+        if not args.warm_caches:
+            # Every user sends the same symptoms and gets the same fake advice, so caches
+            # and request coalescing would hide Gemini and TTS entirely
+            os.environ.update({"GEMINI_CACHE_SIZE": "0", "GEMINI_COALESCE": "0", "TTS_CACHE_MAX_MB": "0"})
+        os.environ.setdefault("UPDATE_QUEUE_SIZE", str(args.users + 1))
+
+        result = asyncio.run(_run(args, telegram))
+
+    _report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            failures = _regressions(result, json.load(f), args.tolerance)
+        if failures:
+            print("Regressions against baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("No regressions against baseline")
+    return None
+
+if __name__ == "__main__":
+    sys.exit(main())
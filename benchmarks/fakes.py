@@ -0,0 +1,394 @@
+"""
+In-process fake upstream services used by the benchmarks.
+
+Each fake runs an aiohttp server on its own thread and event loop, so it keeps
+answering even when the code under test blocks the benchmark's event loop.
+"""
+
+import asyncio
+import base64
+import io
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+FAKE_ADVICE = (
+    "Rest and drink plenty of fluids. Monitor your temperature and consult a "
+    "qualified doctor if the fever lasts more than three days or gets worse."
+)
+
+class FakeServer:
+    """Run an aiohttp application on a background thread"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    def build_app(self) -> web.Application:
+        raise NotImplementedError
+    
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+    
+    def stop(self):
+        if self._loop and self._runner:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+    
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+class FakeGeminiServer(FakeServer):
+    """Minimal Gemini REST API: generateContent and streamGenerateContent"""
+    
+    def __init__(self, latency: float = 1.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, model_latency: Optional[Dict[str, float]] = None,
+                 batch_item_latency: float = 0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        # Per-model latency overrides, e.g. {"gemini-2.5-flash-lite": 0.4}
+        self.model_latency = model_latency or {}
+        # Extra latency per additional query in a multi-prompt (JSON array) request
+        self.batch_item_latency = batch_item_latency
+        self.requests_by_model: Dict[str, int] = {}
+        # Share of requests answered with error_status; both may be changed while running
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Number of upcoming requests answered with error_status regardless of error_rate
+        self.fail_next = 0
+        # Chunks sent before the connection of the next streamed answer is dropped, if set
+        self.cut_next_stream: Optional[int] = None
+        self.requests = 0
+    
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/{version}/models/{model_action}", self._handle)
+        return app
+    
+    async def _delay(self, latency: float):
+        await asyncio.sleep(max(0.0, latency + random.uniform(-self.jitter, self.jitter)))
+    
+    @staticmethod
+    def _response(text: str) -> dict:
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP"
+            }],
+            "usageMetadata": {"promptTokenCount": 120, "candidatesTokenCount": 40, "totalTokenCount": 160}
+        }
+    
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        model, action = request.match_info["model_action"].split(":")
+        self.requests_by_model[model] = self.requests_by_model.get(model, 0) + 1
+        latency = self.model_latency.get(model, self.latency)
+        body = await request.json()
+        
+        if self.fail_next > 0 or (self.error_rate and random.random() < self.error_rate):
+            self.fail_next = max(0, self.fail_next - 1)
+            return web.json_response(
+                {"error": {"code": self.error_status, "message": "Injected failure", "status": "UNAVAILABLE"}},
+                status=self.error_status
+            )
+        
+        if action == "streamGenerateContent":
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            words = FAKE_ADVICE.split(" ")
+            step = max(1, len(words) // 5)
+            cut_after, self.cut_next_stream = self.cut_next_stream, None
+            for i in range(0, len(words), step):
+                if cut_after is not None and i // step >= cut_after:
+                    request.transport.close()
+                    return response
+                await asyncio.sleep(latency / 5)
+                chunk = " ".join(words[i:i + step]) + " "
+                await response.write(f"data: {json.dumps(self._response(chunk))}\r\n\r\n".encode())
+            await response.write_eof()
+            return response
+        
+        if body.get("generationConfig", {}).get("responseMimeType") == "application/json":
+            # Multi-prompt batch: one answer per item of the JSON array after the marker line
+            prompt = body["contents"][0]["parts"][0]["text"]
+            start = prompt.index("\nREQUESTS:\n") + len("\nREQUESTS:\n")
+            count = len(json.JSONDecoder().raw_decode(prompt, start)[0])
+            await self._delay(latency + self.batch_item_latency * max(0, count - 1))
+            answers = [{"request": number, "answer": FAKE_ADVICE} for number in range(1, count + 1)]
+            return web.json_response(self._response(json.dumps(answers)))
+        
+        await self._delay(latency)
+        return web.json_response(self._response(FAKE_ADVICE))
+
+class FakeTelegramServer(FakeServer):
+    """Minimal Telegram Bot API: enough methods for the consultation flow"""
+    
+    def __init__(self, latency: float = 0.0, voice_data: bytes = b"", **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.voice_data = voice_data
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.messages: Dict[int, List[str]] = defaultdict(list)
+        self._message_id = 0
+        # Called as listener(chat_id, text) on the server thread for every message the bot sends
+        self.listener: Optional[Callable[[int, str], None]] = None
+    
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        app.router.add_get("/file/bot{token}/{path:.*}", self._handle_file)
+        return app
+    
+    def _message(self, chat_id: int, **fields) -> dict:
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"}
+        }
+        message.update(fields)
+        return message
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post()) if request.can_read_body else {}
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        chat_id = int(params.get("chat_id", 0) or 0)
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+        elif method in ("sendMessage", "editMessageText"):
+            text = str(params.get("text", ""))
+            self._record(chat_id, text)
+            result = self._message(chat_id, text=text)
+        elif method == "sendVoice":
+            self._record(chat_id, "<voice>")
+            result = self._message(chat_id, voice={
+                "file_id": f"voice-{self._message_id}", "file_unique_id": f"u{self._message_id}", "duration": 1
+            })
+        elif method == "getFile":
+            result = {"file_id": params.get("file_id", "f"), "file_unique_id": "u",
+                      "file_size": len(self.voice_data), "file_path": "voice/file.ogg"}
+        elif method == "getUpdates":
+            await asyncio.sleep(1)
+            result = []
+        else:
+            # answerCallbackQuery, setWebhook, deleteWebhook, ...
+            result = True
+        
+        return web.json_response({"ok": True, "result": result})
+    
+    def _record(self, chat_id: int, text: str):
+        self.messages[chat_id].append(text)
+        if self.listener is not None:
+            self.listener(chat_id, text)
+    
+    async def _handle_file(self, request: web.Request) -> web.Response:
+        self.calls["download"] += 1
+        return web.Response(body=self.voice_data)
+    
+    def completed_consultations(self, marker: str = "Consultation completed") -> int:
+        """Number of chats that received the final consultation message"""
+        return sum(1 for texts in list(self.messages.values()) if any(marker in t for t in texts))
+
+def _flac_seconds(data: bytes) -> float:
+    """Duration of a FLAC stream from its STREAMINFO block (20-bit rate, 36-bit sample count)"""
+    if data[:4] != b"fLaC" or len(data) < 26:
+        return 0.0
+    bits = int.from_bytes(data[18:26], "big")
+    sample_rate = bits >> 44
+    return (bits & ((1 << 36) - 1)) / sample_rate if sample_rate else 0.0
+
+class FakeSpeechServer(FakeServer):
+    """Google Speech API v2 as used by ``Recognizer.recognize_google``"""
+    
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0,
+                 transcript: str = "I have fever and a headache", latency_per_second: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        # Extra latency per second of uploaded audio, as recognition time grows with clip length
+        self.latency_per_second = latency_per_second
+        self.transcript = transcript
+        self.requests = 0
+        self.bytes_received = 0
+    
+    @property
+    def endpoint(self) -> str:
+        """Value for STT_ENDPOINT"""
+        return f"{self.url}/speech-api/v2/recognize"
+    
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/speech-api/v2/recognize", self._handle)
+        return app
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.read()
+        self.bytes_received += len(body)
+        latency = self.latency + self.latency_per_second * _flac_seconds(body)
+        await asyncio.sleep(max(0.0, latency + random.uniform(-self.jitter, self.jitter)))
+        # The real API answers with an empty result line followed by the hypotheses
+        result = {"result": [{"alternative": [{"transcript": self.transcript, "confidence": 0.9}], "final": True}],
+                  "result_index": 0}
+        return web.Response(text='{"result":[]}\n' + json.dumps(result) + "\n", content_type="application/json")
+
+class FakeGoogleTTSServer(FakeServer):
+    """Google Translate batchexecute endpoint as used by gTTS (one request per ~100 characters)"""
+    
+    def __init__(self, latency: float = 0.3, jitter: float = 0.0, payload: bytes = b"", **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.payload = payload or b"\xff\xfb\x90\x64" + bytes(4 * 1024)
+        self.requests = 0
+    
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/_/TranslateWebserverUi/data/batchexecute", self._handle)
+        return app
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await request.read()
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        audio = base64.b64encode(self.payload).decode("ascii")
+        body = ")]}'\n\n" + json.dumps([["wrb.fr", "jQ1olc", json.dumps([audio]), None, None, None, "generic"]],
+                                           separators=(",", ":")) + "\n"
+        return web.Response(text=body)
+    
+    def install(self):
+        """Route the real gTTS client to this server (gTTS has no endpoint option)"""
+        import gtts.tts
+        gtts.tts._translate_url = lambda tld="com", path="": f"{self.url}/{path}"
+
+_update_ids = itertools.count(1)
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+def make_message_update(user_id: int, text: str = None, voice: bool = False) -> dict:
+    """Synthetic private-chat message update"""
+    update_id = next(_update_ids)
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id)
+    }
+    if voice:
+        message["voice"] = {"file_id": f"voice-in-{update_id}", "file_unique_id": f"vin{update_id}", "duration": 3}
+    else:
+        message["text"] = text
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+def make_callback_update(user_id: int, data: str) -> dict:
+    """Synthetic inline keyboard button press"""
+    update_id = next(_update_ids)
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": "keyboard"
+            }
+        }
+    }
+
+def intake_flow(user_id: int, voice: bool = False) -> List[dict]:
+    """The full LANGUAGE→NAME→AGE→PHONE→GENDER→SYMPTOMS conversation for one user"""
+    return [
+        make_message_update(user_id, "/start"),
+        make_callback_update(user_id, "en"),
+        make_message_update(user_id, "Test User"),
+        make_message_update(user_id, "30"),
+        make_message_update(user_id, "9876543210"),
+        make_callback_update(user_id, "male"),
+        make_message_update(user_id, None if voice else "I have fever and a headache", voice=voice)
+    ]
+
+def speech_like_audio(seconds: float = 3.0, leading_silence: float = 0.8, trailing_silence: float = 1.5):
+    """
+    Syllable-like tone bursts between silences, as a decoded 48 kHz stereo voice note.
+    
+    A steady tone would be rejected as noise by voice activity detection.
+    """
+    from pydub import AudioSegment
+    from pydub.generators import Sine
+    
+    audio = AudioSegment.silent(int(leading_silence * 1000), frame_rate=48000)
+    for syllable in range(max(1, int(seconds / 0.25))):
+        tone = Sine(180 + 30 * (syllable % 5), sample_rate=48000)
+        audio += tone.to_audio_segment(duration=180, volume=-12 - 4 * (syllable % 3))
+        audio += AudioSegment.silent(70, frame_rate=48000)
+    audio += AudioSegment.silent(int(trailing_silence * 1000), frame_rate=48000)
+    return audio.set_channels(2)
+
+def gtts_like_mp3(seconds: float = 1.5) -> bytes:
+    """A real MP3 part like gTTS returns per ~100 characters (24 kHz mono, 32 kbit/s); needs ffmpeg"""
+    buffer = io.BytesIO()
+    audio = speech_like_audio(seconds, 0.1, 0.1).set_frame_rate(24000).set_channels(1)
+    audio.export(buffer, format="mp3", bitrate="32k")
+    return buffer.getvalue()
+
+class FakeTTS:
+    """Stand-in for gTTS that returns a fixed MP3 payload without network access"""
+    
+    payload = b"\xff\xfb\x90\x64" + bytes(16 * 1024)
+    
+    def __init__(self, text: str, lang: str = 'en', slow: bool = False):
+        self.text = text
+    
+    def write_to_fp(self, fp):
+        fp.write(self.payload)
+    
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            self.write_to_fp(f)
@@ -0,0 +1,88 @@
+"""
+Throughput at high QPS with and without micro-batching of Gemini requests.
+
+Sends distinct queries at --rate per second for --seconds to ``GeminiClient``
+against a fake Gemini server (--latency per call plus --batch-item-latency per
+extra query in a multi-prompt call). Runs once with GEMINI_BATCH_SIZE=1 and
+once with --batch-size, with model routing held on the primary model, and
+reports throughput, latency percentiles, upstream requests and the mean batch
+size.
+
+    python -m benchmarks.gemini_batching --rate 40 --seconds 15 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import metrics
+from benchmarks.fakes import FakeGeminiServer
+
+async def _query(client, index: int, language: str, latencies: list):
+    start = time.perf_counter()
+    await client.get_medical_advice(f"stomach ache after meal {index}", language)
+    latencies.append(time.perf_counter() - start)
+
+async def _run(args) -> tuple:
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+    rng = random.Random(args.seed)
+
+    latencies: list = []
+    tasks = []
+    started = time.perf_counter()
+    end = started + args.seconds
+    index = 0
+    while time.perf_counter() < end:
+        language = rng.choice(("English", "Hindi", "Marathi"))
+        tasks.append(asyncio.create_task(_query(client, index, language, latencies)))
+        index += 1
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    return sorted(latencies), time.perf_counter() - started
+
+def _counter(name: str) -> int:
+    return int(sum(metrics.get_registry().counters.get(name, {}).values()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=40, help="Queries per second")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=8, help="GEMINI_MAX_CONCURRENCY")
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake Gemini latency per call")
+    parser.add_argument("--batch-item-latency", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=8, help="GEMINI_BATCH_SIZE when batching")
+    parser.add_argument("--window-ms", type=float, default=10, help="GEMINI_BATCH_WINDOW_MS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with FakeGeminiServer(latency=args.latency, batch_item_latency=args.batch_item_latency) as server:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": server.url,
+            "GEMINI_CACHE_SIZE": "0",
+            "GEMINI_COALESCE": "0",
+            "GEMINI_MAX_CONCURRENCY": str(args.concurrency),
+            "GEMINI_TIMEOUT": "300",
+            "GEMINI_BUSY_LOAD": "1e9",
+            "GEMINI_OVERLOAD_LOAD": "1e9",
+            "GEMINI_BATCH_WINDOW_MS": str(args.window_ms)
+        })
+
+        print(f"{'batch':>6} {'queries':>8} {'q/s':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7} "
+              f"{'upstream':>9} {'mean batch':>11}")
+        for batch_size in (1, args.batch_size):
+            os.environ["GEMINI_BATCH_SIZE"] = str(batch_size)
+            metrics.configure(True)
+            requests_before = server.requests
+            latencies, elapsed = asyncio.run(_run(args))
+            batches = _counter("gemini_batches_total")
+            mean_batch = _counter("gemini_batched_requests_total") / batches if batches else 1.0
+            print(f"{batch_size:>6} {len(latencies):>8} {len(latencies) / elapsed:>7.1f} "
+                  f"{latencies[len(latencies) // 2]:>7.2f} {latencies[int(len(latencies) * 0.95) - 1]:>7.2f} "
+                  f"{latencies[-1]:>7.2f} {server.requests - requests_before:>9} {mean_batch:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Burst of identical symptom reports with and without request coalescing.
+
+Fires --burst concurrent queries at ``GeminiClient`` (a --distinct share of
+them with unique symptoms, the rest identical, as during a local outbreak)
+against a fake Gemini server, once with GEMINI_COALESCE off and once on, for
+both the unary and the streaming path. Reports upstream requests (API quota)
+and per-query latency. The response cache is disabled so only in-flight
+sharing is measured.
+
+    python -m benchmarks.gemini_coalescing --burst 200 --latency 1.0 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fakes import FakeGeminiServer
+
+async def _timed(query) -> float:
+    start = time.perf_counter()
+    await query
+    return time.perf_counter() - start
+
+async def _consume_stream(client, symptoms: str):
+    async for _ in client.stream_medical_advice(symptoms, "English"):
+        pass
+
+async def _run(mode: str, burst: int, distinct: float) -> list:
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+
+    unique = int(burst * distinct)
+    symptoms = [f"rash number {i}" if i < unique else "High fever, body ache and chills" for i in range(burst)]
+    if mode == "stream":
+        queries = [_consume_stream(client, text) for text in symptoms]
+    else:
+        queries = [client.get_medical_advice(text, "English") for text in symptoms]
+    return await asyncio.gather(*(_timed(query) for query in queries))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=200, help="Concurrent queries")
+    parser.add_argument("--distinct", type=float, default=0.1, help="Share of queries with unique symptoms")
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake Gemini latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="GEMINI_MAX_CONCURRENCY")
+    args = parser.parse_args()
+
+    with FakeGeminiServer(latency=args.latency) as server:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": server.url,
+            "GEMINI_MAX_CONCURRENCY": str(args.concurrency),
+            "GEMINI_CACHE_SIZE": "0"
+        })
+
+        print(f"{'path':>7} {'coalesce':>9} {'upstream':>9} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+        for mode in ("unary", "stream"):
+            for coalesce in ("0", "1"):
+                os.environ["GEMINI_COALESCE"] = coalesce
+                requests_before = server.requests
+                latencies = sorted(asyncio.run(_run(mode, args.burst, args.distinct)))
+                print(f"{mode:>7} {coalesce:>9} {server.requests - requests_before:>9} "
+                      f"{latencies[len(latencies) // 2]:>7.2f} "
+                      f"{latencies[int(len(latencies) * 0.95) - 1]:>7.2f} {latencies[-1]:>7.2f}")
+
+if __name__ == "__main__":
+    main()
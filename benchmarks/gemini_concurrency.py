@@ -0,0 +1,83 @@
+"""
+Event loop throughput while N consultations wait on Gemini.
+
+Compares the old blocking path (synchronous ``generate_content`` inside a
+coroutine) with the async client behind ``GeminiClient.get_medical_advice``.
+A background "update" coroutine stands in for every other user's message; the
+number of updates it manages to process per second shows how responsive the
+bot stays while advice is being generated.
+
+    python -m benchmarks.gemini_concurrency --consultations 20 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fakes import FakeGeminiServer
+
+async def _count_updates(stop: asyncio.Event) -> int:
+    """Simulate lightweight updates that each need one event loop turn"""
+    processed = 0
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        processed += 1
+    return processed
+
+async def _blocking_advice(client, symptoms: str, language: str) -> str:
+    """The pre-async request path: a sync SDK call inside a coroutine"""
+    prompt = client._create_medical_prompt(symptoms, language)
+    response = client.client.models.generate_content(
+        model=client.model,
+        contents=prompt,
+        config=client._create_generation_config()
+    )
+    return response.text
+
+async def _run(mode: str, consultations: int) -> dict:
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+    
+    def consultation():
+        if mode == "blocking":
+            return _blocking_advice(client, "I have fever", "English")
+        return client.get_medical_advice("I have fever", "English")
+    
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_count_updates(stop))
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(consultation() for _ in range(consultations)))
+    elapsed = time.perf_counter() - start
+    
+    stop.set()
+    updates = await ticker
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "consultations_per_s": consultations / elapsed,
+        "updates_per_s": updates / elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultations", type=int, default=20, help="Concurrent consultations")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Gemini latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="GEMINI_MAX_CONCURRENCY for the async path")
+    args = parser.parse_args()
+    
+    with FakeGeminiServer(latency=args.latency) as server:
+        os.environ["GEMINI_API_KEY"] = "fake-key"
+        os.environ["GEMINI_BASE_URL"] = server.url
+        os.environ["GEMINI_MAX_CONCURRENCY"] = str(args.concurrency)
+        os.environ["GEMINI_COALESCE"] = "0"  # every consultation sends the same symptoms
+        
+        for mode in ("blocking", "async"):
+            result = asyncio.run(_run(mode, args.consultations))
+            print(f"{result['mode']:>8}: {result['elapsed_s']:.2f}s total, "
+                  f"{result['consultations_per_s']:.1f} consultations/s, "
+                  f"{result['updates_per_s']:.1f} updates/s")
+
+if __name__ == "__main__":
+    main()
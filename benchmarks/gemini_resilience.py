@@ -0,0 +1,100 @@
+"""
+Gemini behaviour through healthy, flaky, down and recovered phases.
+
+Sends a steady stream of distinct queries (--rate per second) to
+``GeminiClient`` against a fake Gemini server whose behaviour changes per
+phase:
+
+    healthy   every request succeeds
+    flaky     --flaky-error-rate of requests fail with 503
+    down      requests hang past GEMINI_TIMEOUT
+    recovered every request succeeds again
+
+Runs once without the resilience layer (no retries, breaker disabled) and
+once with it, and reports per phase how many users got real advice, the
+latency they saw and how many requests reached the API.
+
+    python -m benchmarks.gemini_resilience --rate 20 --phase-seconds 10
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from benchmarks.fakes import FakeGeminiServer
+
+PHASES = ("healthy", "flaky", "down", "recovered")
+
+async def _query(client, index: int, fallback: str, results: List[tuple]):
+    start = time.perf_counter()
+    advice = await client.get_medical_advice(f"cough for {index} days", "English")
+    results.append((time.perf_counter() - start, advice != fallback))
+
+async def _run(server: FakeGeminiServer, args) -> Dict[str, dict]:
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+    fallback = client._get_fallback_advice("English")
+
+    summary = {}
+    index = 0
+    for phase in PHASES:
+        server.error_rate = args.flaky_error_rate if phase == "flaky" else 0.0
+        server.latency = args.timeout * 3 if phase == "down" else args.latency
+        requests_before = server.requests
+
+        results: List[tuple] = []
+        tasks = []
+        phase_end = time.perf_counter() + args.phase_seconds
+        while time.perf_counter() < phase_end:
+            tasks.append(asyncio.create_task(_query(client, index, fallback, results)))
+            index += 1
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.gather(*tasks)
+
+        latencies = sorted(latency for latency, _ in results)
+        summary[phase] = {
+            "queries": len(results),
+            "answered": sum(1 for _, answered in results if answered),
+            "p50_s": latencies[len(latencies) // 2],
+            "p95_s": latencies[int(len(latencies) * 0.95) - 1],
+            "upstream": server.requests - requests_before,
+            "breaker": client.breaker.state
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20, help="Queries per second")
+    parser.add_argument("--phase-seconds", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake Gemini latency when healthy")
+    parser.add_argument("--flaky-error-rate", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=3.0, help="GEMINI_TIMEOUT")
+    parser.add_argument("--breaker-reset", type=float, default=3.0, help="GEMINI_BREAKER_RESET")
+    args = parser.parse_args()
+
+    with FakeGeminiServer(latency=args.latency) as server:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": server.url,
+            "GEMINI_CACHE_SIZE": "0",
+            "GEMINI_MAX_CONCURRENCY": "64",
+            "GEMINI_TIMEOUT": str(args.timeout),
+            "GEMINI_BREAKER_RESET": str(args.breaker_reset)
+        })
+
+        configurations = {
+            "plain": {"GEMINI_MAX_RETRIES": "0", "GEMINI_BREAKER_THRESHOLD": "0"},
+            "resilient": {"GEMINI_MAX_RETRIES": "2", "GEMINI_BREAKER_THRESHOLD": "0.5"}
+        }
+        print(f"{'config':>10} {'phase':>10} {'answered':>12} {'p50 s':>7} {'p95 s':>7} {'upstream':>9} {'breaker':>10}")
+        for name, settings in configurations.items():
+            os.environ.update(settings)
+            for phase, result in asyncio.run(_run(server, args)).items():
+                print(f"{name:>10} {phase:>10} {result['answered']:>5}/{result['queries']:<6} "
+                      f"{result['p50_s']:>7.2f} {result['p95_s']:>7.2f} {result['upstream']:>9} "
+                      f"{result['breaker']:>10}")
+
+if __name__ == "__main__":
+    main()
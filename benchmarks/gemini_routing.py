@@ -0,0 +1,100 @@
+"""
+Tail latency during a traffic peak with and without model routing.
+
+Sends distinct queries at --rate per second for --seconds to ``GeminiClient``
+against a fake Gemini server where the primary model answers in
+--primary-latency and the fast model in --fast-latency. A --long-ratio share
+of the queries carries a detailed symptom description. Runs once with routing
+disabled (every query on the primary model with the full budget) and once
+with the default thresholds, and reports latency percentiles and requests
+per model and output budget.
+
+    python -m benchmarks.gemini_routing --rate 12 --seconds 20 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Dict
+
+import metrics
+from benchmarks.fakes import FakeGeminiServer
+
+PRIMARY_MODEL = "gemini-2.5-flash"
+FAST_MODEL = "gemini-2.5-flash-lite"
+
+LONG_SYMPTOMS = ("Fever for three days reaching 102F in the evenings, dry cough that gets worse at night, "
+                 "headache behind the eyes, aching joints, loss of appetite and feeling dizzy when standing "
+                 "up. Took paracetamol twice a day which helps for a few hours. No travel recently, ")
+
+async def _query(client, symptoms: str, language: str, latencies: list):
+    start = time.perf_counter()
+    await client.get_medical_advice(symptoms, language)
+    latencies.append(time.perf_counter() - start)
+
+async def _run(args) -> list:
+    from gemini_client import GeminiClient
+    client = GeminiClient()
+    rng = random.Random(args.seed)
+
+    latencies: list = []
+    tasks = []
+    end = time.perf_counter() + args.seconds
+    index = 0
+    while time.perf_counter() < end:
+        detailed = rng.random() < args.long_ratio
+        symptoms = f"{LONG_SYMPTOMS}case {index}" if detailed else f"sore throat for {index} days"
+        language = rng.choice(("English", "Hindi", "Marathi"))
+        tasks.append(asyncio.create_task(_query(client, symptoms, language, latencies)))
+        index += 1
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    return sorted(latencies)
+
+def _routed_budget() -> Dict[str, int]:
+    """Requests per model and budget, from the metrics registry"""
+    counters = metrics.get_registry().counters.get("gemini_routed_requests_total", {})
+    return {f"{dict(labels)['model']}/{dict(labels)['budget']}": int(count) for labels, count in counters.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=12, help="Queries per second")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=8, help="GEMINI_MAX_CONCURRENCY")
+    parser.add_argument("--primary-latency", type=float, default=1.5)
+    parser.add_argument("--fast-latency", type=float, default=0.5)
+    parser.add_argument("--long-ratio", type=float, default=0.3, help="Share of detailed symptom descriptions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model_latency = {PRIMARY_MODEL: args.primary_latency, FAST_MODEL: args.fast_latency}
+    with FakeGeminiServer(model_latency=model_latency) as server:
+        os.environ.update({
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": server.url,
+            "GEMINI_CACHE_SIZE": "0",
+            "GEMINI_COALESCE": "0",
+            "GEMINI_MAX_CONCURRENCY": str(args.concurrency),
+            "GEMINI_TIMEOUT": "300",
+            "GEMINI_MODEL": PRIMARY_MODEL,
+            "GEMINI_FAST_MODEL": FAST_MODEL
+        })
+
+        configurations = {
+            "off": {"GEMINI_BUSY_LOAD": "1e9", "GEMINI_OVERLOAD_LOAD": "1e9"},
+            "on": {"GEMINI_BUSY_LOAD": "1.0", "GEMINI_OVERLOAD_LOAD": "2.0"}
+        }
+        print(f"{'routing':>8} {'queries':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7}  requests (model/budget)")
+        for name, settings in configurations.items():
+            os.environ.update(settings)
+            metrics.configure(True)
+            latencies = asyncio.run(_run(args))
+            routed = ", ".join(f"{key}={count}" for key, count in sorted(_routed_budget().items()))
+            print(f"{name:>8} {len(latencies):>8} {latencies[len(latencies) // 2]:>7.2f} "
+                  f"{latencies[int(len(latencies) * 0.95) - 1]:>7.2f} "
+                  f"{latencies[int(len(latencies) * 0.99) - 1]:>7.2f} {latencies[-1]:>7.2f}  {routed}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Replay a recorded update stream through the bot and check per-user ordering.
+
+Record a synthetic stream (users' intake conversations randomly interleaved,
+each user's own updates in order), then replay it straight into the
+application's update queue with different CONCURRENT_UPDATES settings. Fake
+Telegram and Gemini servers stand in for the network; gTTS is stubbed.
+
+    python -m benchmarks.replay_updates --record stream.jsonl --users 500
+    python -m benchmarks.replay_updates --replay stream.jsonl --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from telegram import Update
+
+from benchmarks.fakes import FakeGeminiServer, FakeTelegramServer, FakeTTS, intake_flow
+
+# Prompts each English conversation must receive, in this order
+EXPECTED_FLOW = [
+    "Welcome to Health Chatbot",
+    "Please enter your full name",
+    "Please enter your age",
+    "Please enter your phone number",
+    "Please select your gender",
+    "Please describe your symptoms",
+    "Consultation completed"
+]
+
+def record(path: str, users: int, seed: int = 0):
+    """Write an interleaved stream of complete intake conversations"""
+    rng = random.Random(seed)
+    pending = {10_000 + i: intake_flow(10_000 + i) for i in range(users)}
+    with open(path, 'w', encoding='utf-8') as f:
+        while pending:
+            user_id = rng.choice(list(pending))
+            f.write(json.dumps(pending[user_id].pop(0)) + "\n")
+            if not pending[user_id]:
+                del pending[user_id]
+    print(f"Recorded {users * 7} updates from {users} users to {path}")
+
+def _ordering_violations(messages: Dict[int, List[str]]) -> int:
+    violations = 0
+    for texts in messages.values():
+        position = 0
+        for text in texts:
+            if text.startswith("❌"):
+                violations += 1
+                break
+            if position < len(EXPECTED_FLOW) and EXPECTED_FLOW[position] in text:
+                position += 1
+        else:
+            if position != len(EXPECTED_FLOW):
+                violations += 1
+    return violations
+
+async def _replay(updates: List[dict], users: int, telegram: FakeTelegramServer, timeout: float) -> dict:
+    from bot import HealthChatBot
+    bot = HealthChatBot("123456:FAKE")
+    application = bot.application
+    
+    await application.initialize()
+    await application.start()
+    start = time.perf_counter()
+    for data in updates:
+        await application.update_queue.put(Update.de_json(data, application.bot))
+    
+    while telegram.completed_consultations() < users and time.perf_counter() - start < timeout:
+        await asyncio.sleep(0.02)
+    elapsed = time.perf_counter() - start
+    
+    await application.stop()
+    await application.shutdown()
+    bot.data_manager.close()
+    bot.voice_processor.close()
+    return {
+        "elapsed": elapsed,
+        "completed": telegram.completed_consultations(),
+        "violations": _ordering_violations(telegram.messages)
+    }
+
+def replay(path: str, concurrency_levels: List[int], gemini_latency: float, timeout: float):
+    with open(path, 'r', encoding='utf-8') as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+    users = len({u.get("message", u.get("callback_query", {})).get("from", {}).get("id") for u in updates})
+    
+    import tts_engines
+    tts_engines.gTTS = FakeTTS
+    # FakeTTS returns placeholder MP3 bytes, which cannot be transcoded to Opus
+    os.environ.setdefault("TTS_FORMAT", "mp3")
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    
+    with FakeGeminiServer(latency=gemini_latency) as gemini:
+        for level in concurrency_levels:
+            with FakeTelegramServer() as telegram:
+                os.environ.update({
+                    "TELEGRAM_BASE_URL": telegram.url,
+                    "GEMINI_API_KEY": "fake-key",
+                    "GEMINI_BASE_URL": gemini.url,
+                    "GEMINI_CACHE_SIZE": "0",
+                    "GEMINI_COALESCE": "0",
+                    "GEMINI_MAX_CONCURRENCY": str(max(level, 8)),
+                    "ADVICE_STREAMING": "0",
+                    "DATA_BACKEND": "jsonl",
+                    "DATA_FILE": os.path.join(workdir, f"users_{level}.jsonl"),
+                    "PERSISTENCE_PATH": os.path.join(workdir, f"bot_state_{level}.db"),
+                    "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+                    "AUDIO_TRANSCODE_POOL": "thread",
+                    "UPDATE_QUEUE_SIZE": str(len(updates) + 1),
+                    "CONCURRENT_UPDATES": str(level)
+                })
+                result = asyncio.run(_replay(updates, users, telegram, timeout))
+            print(f"concurrency {level:>4}: {result['completed']}/{users} consultations in {result['elapsed']:.2f}s "
+                  f"({len(updates) / result['elapsed']:.0f} updates/s), "
+                  f"{result['violations']} conversations out of order")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", metavar="PATH", help="Write a synthetic stream to PATH")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--replay", metavar="PATH", help="Replay the stream at PATH")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--gemini-latency", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    if args.record:
+        record(args.record, args.users)
+    if args.replay:
+        replay(args.replay, args.concurrency, args.gemini_latency, args.timeout)
+    if not args.record and not args.replay:
+        parser.error("give --record and/or --replay")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Write and read throughput of the DataManager storage backends.
+
+For each dataset size the store is preloaded with that many records, then
+timed for: appending --writes new consultations through save_user_data,
+get_user_history lookups, get_statistics and reopening the store. The JSON
+array backend rewrites the whole file per save, so it is only run up to
+--json-max records.
+
+    python -m benchmarks.storage_backends --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from data_manager import DataManager
+from storage import SqliteStorage
+
+USERS = 5000
+
+def _record(i: int) -> dict:
+    return {
+        "user_id": 1000 + i % USERS,
+        "username": f"user{i % USERS}",
+        "name": "Test User",
+        "age": 30,
+        "phone": "9876543210",
+        "gender": random.choice(["Male", "Female", "Other"]),
+        "language": random.choice(["English", "Hindi", "Marathi"]),
+        "symptoms": "I have fever and headache since yesterday",
+        "advice": "Rest, drink fluids and consult a doctor if it persists. " * 8,
+        "date": (datetime(2025, 1, 1) + timedelta(minutes=i)).isoformat()
+    }
+
+def _user_data(i: int) -> dict:
+    record = _record(i)
+    record["language_name"] = record.pop("language")
+    return record
+
+def _preload(backend: str, path: str, size: int):
+    records = (_record(i) for i in range(size))
+    if backend == "json":
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(list(records), f, ensure_ascii=False, indent=2)
+    elif backend == "jsonl":
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+    else:
+        storage = SqliteStorage(path)
+        storage.append_many(records)
+        storage.close()
+
+def _bench(backend: str, size: int, writes: int, reads: int, workdir: str) -> dict:
+    extension = "db" if backend == "sqlite" else backend
+    path = os.path.join(workdir, f"users_{size}.{extension}")
+    _preload(backend, path, size)
+    
+    start = time.perf_counter()
+    manager = DataManager(data_file=path, backend=backend)
+    open_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for i in range(writes):
+        manager.save_user_data(_user_data(size + i))
+    write_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(reads):
+        manager.get_user_history(1000 + random.randrange(USERS))
+    history_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(reads):
+        manager.get_statistics()
+    stats_s = time.perf_counter() - start
+    
+    manager.close()
+    return {
+        "open_ms": open_s * 1000,
+        "writes_per_s": writes / write_s,
+        "history_ms": history_s / reads * 1000,
+        "stats_ms": stats_s / reads * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=["json", "jsonl", "sqlite"])
+    parser.add_argument("--writes", type=int, default=1000, help="Saves timed per run")
+    parser.add_argument("--reads", type=int, default=200, help="History/statistics lookups timed per run")
+    parser.add_argument("--json-max", type=int, default=100_000, help="Largest size to run the JSON array backend at")
+    args = parser.parse_args()
+    
+    # Silence per-save INFO logs from DataManager
+    logging.disable(logging.INFO)
+    
+    workdir = tempfile.mkdtemp(prefix="storage_bench_")
+    try:
+        print(f"{'backend':>8} {'records':>9} {'open ms':>9} {'writes/s':>10} {'history ms':>11} {'stats ms':>9}")
+        for size in args.sizes:
+            for backend in args.backends:
+                if backend == "json" and size > args.json_max:
+                    continue
+                writes = min(args.writes, 20) if backend == "json" else args.writes
+                r = _bench(backend, size, writes, args.reads, workdir)
+                print(f"{backend:>8} {size:>9} {r['open_ms']:>9.1f} {r['writes_per_s']:>10.0f} "
+                      f"{r['history_ms']:>11.3f} {r['stats_ms']:>9.3f}")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Speech recognition latency per engine and language on sample clips.
+
+Clips are WAV files named ``<language>_*.wav`` (e.g. ``hi-IN_fever.wav``) in
+--clips; without it, generated tone bursts are used for every language, which
+measures engine overhead only (local engines will not understand them). Each
+clip goes through the same 16 kHz trimming as in the bot, then through every
+engine available for its language:
+
+    google  Google Web Speech, pointed at a fake server with --google-latency
+            unless --real-google is given
+    vosk    local models given with --vosk-model (needs the vosk package)
+
+Reports per-clip latency and the time for one serial pass over all clips of
+a language.
+
+    python -m benchmarks.stt_engines --clips samples/ --vosk-model en-US=models/vosk-model-small-en-us-0.15 \\
+        --vosk-model hi-IN=models/vosk-model-small-hi-0.22 --real-google
+"""
+
+import argparse
+import glob
+import io
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import speech_recognition as sr
+from pydub import AudioSegment
+
+from benchmarks.fakes import FakeSpeechServer, speech_like_audio
+from stt_engines import GoogleSTTEngine, STTEngine, VoskSTTEngine
+from voice_processor import prepare_speech_audio
+
+LANGUAGES = ("en-US", "hi-IN", "mr-IN")
+
+def _load_clips(directory: str) -> Dict[str, List[AudioSegment]]:
+    clips: Dict[str, List[AudioSegment]] = {}
+    if directory:
+        for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+            language = os.path.basename(path).split("_")[0]
+            clips.setdefault(language, []).append(AudioSegment.from_wav(path))
+    else:
+        clips = {language: [speech_like_audio(seconds) for seconds in (2, 4, 6)] for language in LANGUAGES}
+    return clips
+
+def _to_audio_data(audio: AudioSegment) -> sr.AudioData:
+    prepared = prepare_speech_audio(audio) or prepare_speech_audio(audio, trim_silence=False)
+    buffer = io.BytesIO()
+    prepared.export(buffer, format="wav")
+    buffer.seek(0)
+    with sr.AudioFile(buffer) as source:
+        return sr.Recognizer().record(source)
+
+def _bench(engine: STTEngine, language: str, clips: List[sr.AudioData], iterations: int) -> dict:
+    timings = []
+    understood = 0
+    for _ in range(iterations):
+        for audio in clips:
+            start = time.perf_counter()
+            try:
+                engine.transcribe(audio, language)
+                understood += 1
+            except ValueError:
+                pass
+            timings.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for audio in clips:
+        try:
+            engine.transcribe(audio, language)
+        except ValueError:
+            pass
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+        "understood": f"{understood}/{len(timings)}",
+        "batch_ms": batch_ms
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", help="Directory of <language>_*.wav clips")
+    parser.add_argument("--vosk-model", action="append", default=[], metavar="LANG=PATH",
+                        help="Vosk model directory for a language (repeatable)")
+    parser.add_argument("--real-google", action="store_true", help="Call the real Google API instead of a fake")
+    parser.add_argument("--google-latency", type=float, default=0.5, help="Fake Google STT latency")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    clips = {language: [_to_audio_data(audio) for audio in audios]
+             for language, audios in _load_clips(args.clips).items()}
+
+    vosk_models = dict(entry.split("=", 1) for entry in args.vosk_model)
+    engines: List[STTEngine] = []
+    if vosk_models:
+        started = time.perf_counter()
+        engines.append(VoskSTTEngine(vosk_models))
+        print(f"Vosk models loaded in {time.perf_counter() - started:.1f}s")
+
+    with FakeSpeechServer(latency=args.google_latency) as server:
+        engines.insert(0, GoogleSTTEngine(endpoint=None if args.real_google else server.endpoint))
+
+        print(f"{'engine':>8} {'language':>9} {'clips':>6} {'mean ms':>9} {'p95 ms':>9} {'understood':>11} {'batch ms':>9}")
+        for engine in engines:
+            for language, audio in clips.items():
+                if isinstance(engine, VoskSTTEngine) and language not in engine.models:
+                    continue
+                result = _bench(engine, language, audio, args.iterations)
+                print(f"{engine.name:>8} {language:>9} {len(audio):>6} {result['mean_ms']:>9.1f} "
+                      f"{result['p95_ms']:>9.1f} {result['understood']:>11} {result['batch_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
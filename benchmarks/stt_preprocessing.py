@@ -0,0 +1,84 @@
+"""
+Bytes uploaded to speech recognition and local preparation time, before and after VAD trimming.
+
+Takes a decoded voice note (--wav, or generated 48 kHz stereo tone bursts
+with --leading-silence/--trailing-silence around them) and prepares it for
+recognize_google both ways, without ffmpeg or network access:
+
+    original  full clip in its decoded format, 0.5 s ambient noise calibration
+    trimmed   16 kHz mono, trimmed to the voiced part, no calibration
+
+and reports the FLAC payload size that would be uploaded and the time spent
+preparing it. Also checks that silence and steady noise clips are rejected.
+
+    python -m benchmarks.stt_preprocessing --seconds 4 --trailing-silence 3
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+import speech_recognition as sr
+from pydub import AudioSegment
+from pydub.generators import WhiteNoise
+
+from benchmarks.fakes import speech_like_audio
+from voice_processor import prepare_speech_audio
+
+def _original(audio: AudioSegment) -> bytes:
+    buffer = io.BytesIO()
+    audio.export(buffer, format="wav")
+    buffer.seek(0)
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(buffer) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        recorded = recognizer.record(source)
+    return recorded.get_flac_data()
+
+def _trimmed(audio: AudioSegment) -> bytes:
+    prepared = prepare_speech_audio(audio)
+    buffer = io.BytesIO()
+    prepared.export(buffer, format="wav")
+    buffer.seek(0)
+    with sr.AudioFile(buffer) as source:
+        recorded = sr.Recognizer().record(source)
+    return recorded.get_flac_data()
+
+def _measure(prepare, audio: AudioSegment, iterations: int) -> tuple:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        payload = prepare(audio)
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(payload), statistics.mean(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", help="Decoded voice note to use instead of generated audio")
+    parser.add_argument("--seconds", type=float, default=4.0, help="Length of generated speech")
+    parser.add_argument("--leading-silence", type=float, default=1.0)
+    parser.add_argument("--trailing-silence", type=float, default=2.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.wav:
+        audio = AudioSegment.from_wav(args.wav)
+    else:
+        audio = speech_like_audio(args.seconds, args.leading_silence, args.trailing_silence)
+
+    print(f"clip: {len(audio) / 1000:.1f}s, {audio.frame_rate} Hz, {audio.channels} channel(s)")
+    print(f"{'pipeline':>10} {'upload KB':>10} {'prepare ms':>11}")
+    for name, prepare in (("original", _original), ("trimmed", _trimmed)):
+        size, mean_ms = _measure(prepare, audio, args.iterations)
+        print(f"{name:>10} {size / 1024:>10.1f} {mean_ms:>11.1f}")
+
+    rejected = {
+        "silence": AudioSegment.silent(3000, frame_rate=48000),
+        "noise": WhiteNoise(sample_rate=48000).to_audio_segment(duration=3000, volume=-25)
+    }
+    for name, clip in rejected.items():
+        print(f"{name} clip rejected: {prepare_speech_audio(clip) is None}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Transcription latency of long voice notes, whole-clip versus streamed in segments.
+
+Generates OGG/Opus voice notes of --durations seconds made of 2-5 s phrases
+between short pauses and transcribes each with VoiceProcessor twice: once as
+one clip (STT_STREAMING=0) and once split at pauses into segments of at most
+--segment-seconds recognized concurrently. A fake Google endpoint answers
+after --google-latency plus --latency-per-second for each second of audio,
+so whole-clip latency grows with note length. Reports total latency and, for
+streaming, when the first partial transcript arrived. Needs ffmpeg.
+
+    python -m benchmarks.stt_streaming --durations 15 60 120 --segment-seconds 15
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import time
+
+from pydub import AudioSegment
+
+from benchmarks.fakes import FakeSpeechServer, speech_like_audio
+
+def _voice_note(seconds: float, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    audio = AudioSegment.silent(500, frame_rate=48000).set_channels(2)
+    while len(audio) < seconds * 1000:
+        audio += speech_like_audio(rng.uniform(2.0, 5.0), 0.0, rng.uniform(0.4, 0.9))
+    buffer = io.BytesIO()
+    audio.set_channels(1).export(buffer, format="ogg", codec="libopus", bitrate="32k")
+    return buffer.getvalue()
+
+async def _transcribe(ogg_data: bytes, streaming: bool) -> dict:
+    os.environ["STT_STREAMING"] = "1" if streaming else "0"
+    from voice_processor import VoiceProcessor
+    processor = VoiceProcessor()
+    first_partial = []
+    started = time.perf_counter()
+
+    async def on_partial(text: str):
+        if not first_partial:
+            first_partial.append(time.perf_counter() - started)
+
+    text = await processor.transcribe_voice_bytes(ogg_data, "en-US", on_partial)
+    elapsed = time.perf_counter() - started
+    processor.close()
+    return {"elapsed": elapsed, "first_partial": first_partial[0] if first_partial else None, "ok": bool(text)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[15, 30, 60, 120], help="Note lengths in seconds")
+    parser.add_argument("--segment-seconds", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=4, help="Segments recognized at once per note")
+    parser.add_argument("--google-latency", type=float, default=0.3)
+    parser.add_argument("--latency-per-second", type=float, default=0.1, help="Fake STT time per second of audio")
+    args = parser.parse_args()
+
+    with FakeSpeechServer(latency=args.google_latency, latency_per_second=args.latency_per_second) as server:
+        os.environ.update({
+            "STT_ENDPOINT": server.endpoint,
+            "STT_SEGMENT_SECONDS": str(args.segment_seconds),
+            "STT_SEGMENT_CONCURRENCY": str(args.concurrency),
+            "AUDIO_TRANSCODE_POOL": "thread",
+            "TTS_CACHE_MAX_MB": "0"
+        })
+        print(f"{'seconds':>8} {'whole s':>8} {'streamed s':>11} {'first partial s':>16} {'requests':>9}")
+        for seconds in args.durations:
+            ogg_data = _voice_note(seconds)
+            whole = asyncio.run(_transcribe(ogg_data, False))
+            requests = server.requests
+            streamed = asyncio.run(_transcribe(ogg_data, True))
+            first = f"{streamed['first_partial']:.2f}" if streamed["first_partial"] is not None else "-"
+            print(f"{seconds:>8.0f} {whole['elapsed']:>8.2f} {streamed['elapsed']:>11.2f} {first:>16} "
+                  f"{server.requests - requests:>9}")
+
+if __name__ == "__main__":
+    main()
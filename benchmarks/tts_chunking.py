@@ -0,0 +1,57 @@
+"""
+Voice reply latency against advice length with serial and chunked parallel TTS.
+
+Synthesizes English and Hindi advice of --lengths characters with the real
+gTTS client against a fake Google endpoint (--gtts-latency per request).
+Each --workers setting synthesizes sentence chunks on a pool of that size;
+1 is the serial baseline, where latency grows with every 100 characters.
+Replies are OGG/Opus when ffmpeg is available, otherwise MP3.
+
+    python -m benchmarks.tts_chunking --lengths 200 800 1600 --workers 1 4 8
+"""
+
+import argparse
+import shutil
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeGoogleTTSServer, gtts_like_mp3
+from benchmarks.tts_engines import _text
+from tts_engines import GTTSEngine, split_sentences
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 400, 800, 1600],
+                        help="Advice lengths in characters")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8], help="Chunk pool sizes to compare")
+    parser.add_argument("--gtts-latency", type=float, default=0.3, help="Fake gTTS latency per request")
+    parser.add_argument("--iterations", type=int, default=2)
+    args = parser.parse_args()
+
+    audio_format = "ogg" if shutil.which("ffmpeg") else "mp3"
+    payload = gtts_like_mp3() if audio_format == "ogg" else b""
+    print(f"Reply format: {audio_format}")
+    print(f"{'workers':>8} {'language':>9} {'chars':>6} {'chunks':>7} {'median s':>9}")
+
+    with FakeGoogleTTSServer(latency=args.gtts_latency, payload=payload) as server:
+        server.install()
+        for workers in args.workers:
+            executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+            engine = GTTSEngine(audio_format)
+            engine.chunk_executor = executor
+            for language in ("en", "hi"):
+                for length in args.lengths:
+                    text = _text(language, length)
+                    timings = []
+                    for _ in range(args.iterations):
+                        start = time.perf_counter()
+                        engine.synthesize(text, language)
+                        timings.append(time.perf_counter() - start)
+                    print(f"{workers:>8} {language:>9} {length:>6} {len(split_sentences(text)):>7} "
+                          f"{statistics.median(timings):>9.2f}")
+            if executor is not None:
+                executor.shutdown()
+
+if __name__ == "__main__":
+    main()
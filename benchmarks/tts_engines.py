@@ -0,0 +1,91 @@
+"""
+Speech synthesis latency per character for each TTS engine and voice language.
+
+Synthesizes advice texts of --lengths characters in English, Hindi and
+Marathi with every available engine:
+
+    gtts   real gTTS client against a fake Google endpoint with --gtts-latency
+           per request (gTTS sends one request per ~100 characters)
+    piper  local voices given with --piper-voice (needs the piper-tts package);
+           OGG/Opus encoding additionally needs ffmpeg, otherwise only the raw
+           synthesis is timed
+
+Reports mean time, milliseconds per character and the coefficient of
+variation of ms/char across lengths (lower is more predictable).
+
+    python -m benchmarks.tts_engines --piper-voice en=voices/en_US-lessac-medium.onnx \\
+        --piper-voice hi=voices/hi_IN-pratham-medium.onnx
+"""
+
+import argparse
+import shutil
+import statistics
+import time
+from typing import Callable, List
+
+from benchmarks.fakes import FakeGoogleTTSServer
+from tts_engines import GTTSEngine, PiperTTSEngine
+
+SAMPLE_TEXTS = {
+    "en": "Rest well and drink plenty of fluids. Check your temperature twice a day. "
+          "See a doctor if the fever lasts more than three days. ",
+    "hi": "अच्छी तरह आराम करें और खूब पानी पिएं। दिन में दो बार तापमान जांचें। "
+          "अगर बुखार तीन दिन से ज्यादा रहे तो डॉक्टर से मिलें। ",
+    "mr": "चांगली विश्रांती घ्या आणि भरपूर पाणी प्या. दिवसातून दोनदा ताप तपासा. "
+          "ताप तीन दिवसांपेक्षा जास्त राहिल्यास डॉक्टरांना भेटा। "
+}
+
+def _text(language: str, length: int) -> str:
+    sample = SAMPLE_TEXTS[language]
+    return (sample * (length // len(sample) + 1))[:length]
+
+def _bench(synthesize: Callable[[str, str], object], language: str, lengths: List[int], iterations: int) -> dict:
+    per_char = []
+    durations = []
+    for length in lengths:
+        text = _text(language, length)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            synthesize(text, language)
+            elapsed = time.perf_counter() - start
+            durations.append(elapsed)
+            per_char.append(elapsed * 1000 / length)
+    mean_per_char = statistics.mean(per_char)
+    return {
+        "mean_s": statistics.mean(durations),
+        "ms_per_char": mean_per_char,
+        "cv": statistics.pstdev(per_char) / mean_per_char if mean_per_char else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 600, 1200], help="Text lengths in characters")
+    parser.add_argument("--piper-voice", action="append", default=[], metavar="LANG=PATH",
+                        help="Piper voice model for a voice language (repeatable)")
+    parser.add_argument("--gtts-latency", type=float, default=0.3, help="Fake gTTS latency per request")
+    parser.add_argument("--iterations", type=int, default=2)
+    args = parser.parse_args()
+
+    engines = []
+    with FakeGoogleTTSServer(latency=args.gtts_latency) as server:
+        server.install()
+        gtts_engine = GTTSEngine()
+        engines.append(("gtts", gtts_engine.synthesize, list(SAMPLE_TEXTS)))
+
+        if args.piper_voice:
+            started = time.perf_counter()
+            piper = PiperTTSEngine(dict(entry.split("=", 1) for entry in args.piper_voice))
+            print(f"Piper voices loaded in {time.perf_counter() - started:.1f}s")
+            engines.append(("piper (pcm)", piper.synthesize_part, list(piper.voices)))
+            if shutil.which("ffmpeg"):
+                engines.append(("piper", piper.synthesize, list(piper.voices)))
+
+        print(f"{'engine':>12} {'language':>9} {'mean s':>8} {'ms/char':>8} {'cv':>6}")
+        for name, synthesize, languages in engines:
+            for language in languages:
+                result = _bench(synthesize, language, args.lengths, args.iterations)
+                print(f"{name:>12} {language:>9} {result['mean_s']:>8.2f} {result['ms_per_char']:>8.2f} "
+                      f"{result['cv']:>6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Bytes sent and encode time per voice reply format.
+
+Takes an advice-length MP3 as gTTS produces it (--mp3, or generated
+speech-like audio of --seconds) and compares sending it unchanged with
+streaming it through the OGG/Opus encoder at each --bitrates. The MP3 is fed
+in ~1.5 s parts, --part-latency apart like gTTS requests, so "tail ms" is the
+encode time left after synthesis ends. Also estimates upload time over a
+--uplink-kbps link; tail plus upload is what the user waits for after
+synthesis. Needs ffmpeg.
+
+    python -m benchmarks.voice_formats --seconds 60 --bitrates 16k 24k 32k --uplink-kbps 1000
+"""
+
+import argparse
+import shutil
+import statistics
+import time
+from typing import List, Tuple
+
+from benchmarks.fakes import gtts_like_mp3
+from tts_engines import encode_opus_stream
+
+def _mp3_parts(args) -> List[bytes]:
+    if args.mp3:
+        with open(args.mp3, 'rb') as f:
+            data = f.read()
+        size = max(1, len(data) // max(1, round(args.seconds / 1.5)))
+        return [data[i:i + size] for i in range(0, len(data), size)]
+    # gTTS returns one MP3 part per ~100 characters; concatenated parts are one valid stream
+    return [gtts_like_mp3() for _ in range(max(1, round(args.seconds / 1.5)))]
+
+def _encode(parts: List[bytes], bitrate: str, part_latency: float) -> Tuple[int, float]:
+    """Encode parts arriving part_latency apart; returns output size and seconds after the last part"""
+    last_write = [0.0]
+
+    def write_parts(pipe):
+        for part in parts:
+            time.sleep(part_latency)
+            pipe.write(part)
+        last_write[0] = time.perf_counter()
+
+    encoded = encode_opus_stream(write_parts, ["-f", "mp3"], bitrate)
+    return len(encoded), time.perf_counter() - last_write[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mp3", help="MP3 file to use instead of generated audio")
+    parser.add_argument("--seconds", type=float, default=45.0, help="Length of generated audio")
+    parser.add_argument("--bitrates", nargs="+", default=["16k", "24k", "32k"], help="Opus bitrates to compare")
+    parser.add_argument("--part-latency", type=float, default=0.1, help="Delay before each MP3 part")
+    parser.add_argument("--uplink-kbps", type=float, default=1000.0, help="Upload bandwidth for the estimate")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        parser.error("ffmpeg is required")
+
+    parts = _mp3_parts(args)
+    mp3_size = sum(len(part) for part in parts)
+    results = [("mp3", mp3_size, 0.0, 0.0)]
+    for bitrate in args.bitrates:
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            size, _ = _encode(parts, bitrate, 0.0)
+            timings.append(time.perf_counter() - start)
+        tails = [_encode(parts, bitrate, args.part_latency)[1] for _ in range(args.iterations)]
+        results.append((f"ogg {bitrate}", size, statistics.median(timings), statistics.median(tails)))
+
+    print(f"{len(parts)} parts, {mp3_size} bytes of MP3")
+    print(f"{'format':>10} {'bytes':>9} {'vs mp3':>7} {'encode ms':>10} {'tail ms':>8} {'upload ms':>10} "
+          f"{'wait ms':>8}")
+    for name, size, encode, tail in results:
+        upload = size * 8 / (args.uplink_kbps * 1000)
+        print(f"{name:>10} {size:>9} {size / mp3_size:>7.2f} {encode * 1000:>10.1f} {tail * 1000:>8.1f} "
+              f"{upload * 1000:>10.1f} {(tail + upload) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
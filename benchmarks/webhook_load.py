@@ -0,0 +1,120 @@
+"""
+Local webhook load test: POST synthetic updates at the bot without Telegram.
+
+Runs ``HealthChatBot`` in webhook mode in this process against a fake Bot API
+and a fake Gemini server (gTTS is stubbed), then drives --users complete
+intake conversations through the webhook endpoint concurrently. Reports
+webhook accept rate and end-to-end consultations per second.
+
+    python -m benchmarks.webhook_load --users 200 --gemini-latency 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks.fakes import FakeGeminiServer, FakeTelegramServer, FakeTTS, intake_flow
+
+SECRET = "load-test-secret"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _drive_user(session: aiohttp.ClientSession, url: str, user_id: int, statuses: dict):
+    # Each user's updates are posted in order, like Telegram does for one chat
+    for update in intake_flow(user_id):
+        while True:
+            async with session.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as response:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+                if response.status != 503:
+                    break
+            await asyncio.sleep(0.05)  # queue full: back off like Telegram's redelivery
+
+async def _run(args, telegram: FakeTelegramServer):
+    import tts_engines
+    tts_engines.gTTS = FakeTTS
+    # FakeTTS returns placeholder MP3 bytes, which cannot be transcoded to Opus
+    os.environ.setdefault("TTS_FORMAT", "mp3")
+    from bot import HealthChatBot
+    
+    bot = HealthChatBot("123456:FAKE")
+    bot_task = asyncio.create_task(bot._run_webhook())
+    url = f"http://127.0.0.1:{os.environ['WEBHOOK_PORT']}{os.environ['WEBHOOK_PATH']}"
+    
+    # Wait for the webhook server to come up
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(url.rsplit("/", 1)[0] + "/healthz"):
+                    break
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.05)
+        
+        statuses = {}
+        start = time.perf_counter()
+        await asyncio.gather(*(_drive_user(session, url, 10_000 + i, statuses) for i in range(args.users)))
+        posted = time.perf_counter() - start
+        
+        while telegram.completed_consultations() < args.users:
+            if time.perf_counter() - start > args.timeout:
+                break
+            await asyncio.sleep(0.05)
+        finished = time.perf_counter() - start
+    
+    os.kill(os.getpid(), signal.SIGTERM)
+    await bot_task
+    bot.data_manager.close()
+    bot.voice_processor.close()
+    
+    updates = args.users * 7
+    print(f"posted {updates} updates in {posted:.2f}s ({updates / posted:.0f} updates/s), HTTP statuses {statuses}")
+    print(f"{telegram.completed_consultations()}/{args.users} consultations completed in {finished:.2f}s "
+          f"({telegram.completed_consultations() / finished:.1f} consultations/s)")
+    print(f"Bot API calls: {dict(telegram.calls)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="webhook_load_")
+    
+    with FakeTelegramServer(latency=args.telegram_latency) as telegram, \
+            FakeGeminiServer(latency=args.gemini_latency) as gemini:
+        os.environ.update({
+            "TELEGRAM_BASE_URL": telegram.url,
+            "GEMINI_API_KEY": "fake-key",
+            "GEMINI_BASE_URL": gemini.url,
+            "GEMINI_CACHE_SIZE": "0",
+            "GEMINI_COALESCE": "0",
+            "ADVICE_STREAMING": "0",
+            "DATA_BACKEND": "jsonl",
+            "DATA_FILE": os.path.join(workdir, "users.jsonl"),
+            "PERSISTENCE_PATH": os.path.join(workdir, "bot_state.db"),
+            "TTS_CACHE_DIR": os.path.join(workdir, "tts_cache"),
+            "AUDIO_TRANSCODE_POOL": "thread",
+            "UPDATE_QUEUE_SIZE": str(args.queue_size),
+            "WEBHOOK_LISTEN": "127.0.0.1",
+            "WEBHOOK_PORT": str(_free_port()),
+            "WEBHOOK_PATH": "/telegram",
+            "WEBHOOK_SECRET": SECRET
+        })
+        os.environ.pop("WEBHOOK_URL", None)
+        asyncio.run(_run(args, telegram))
+
+if __name__ == "__main__":
+    main()
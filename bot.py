@@ -2,22 +2,32 @@
 Telegram Health Chatbot implementation with voice processing and AI medical advice.
 """
 
+import asyncio
 import logging
 import os
+import signal
 import tempfile
+import time
+from typing import Awaitable, Callable, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, RetryAfter, TelegramError
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, CallbackQueryHandler,
     ConversationHandler, filters, ContextTypes
 )
 
+import metrics
 from gemini_client import GeminiClient
 from voice_processor import VoiceProcessor
+from persistence import create_persistence
+from update_processor import PerUserUpdateProcessor
+from webhook_server import WebhookServer, pending_updates
+from worker_pools import WorkerPoolBusyError
 from data_manager import DataManager
 from validators import Validators
 from constants import (
     STATES, LANGUAGES, GENDERS, MESSAGES,
-    LANGUAGE_CODES, VOICE_LANGUAGES
+    LANGUAGE_CODES, VOICE_LANGUAGES, TELEGRAM_MESSAGE_LIMIT
 )
 
 logger = logging.getLogger(__name__)
@@ -26,15 +36,68 @@ class HealthChatBot:
     def __init__(self, token: str):
         """Initialize the health chatbot with necessary components"""
         self.token = token
-        self.application = Application.builder().token(token).build()
+        
+        # Per-stage latency histograms and counters; free when METRICS_ENABLED is off
+        metrics.configure(os.environ.get("METRICS_ENABLED", "0").lower() in ("1", "true", "yes"))
+        self.metrics_server = metrics.MetricsServer(
+            listen=os.environ.get("METRICS_LISTEN") or "0.0.0.0",
+            port=int(os.environ.get("METRICS_PORT") or 9100)
+        ) if metrics.enabled() else None
+        
+        self.application = self._build_application(token)
         self.gemini_client = GeminiClient()
         self.voice_processor = VoiceProcessor()
         self.data_manager = DataManager()
         self.validators = Validators()
         
+        # Stream advice into the status message; edits are rate limited per message
+        self.stream_advice = os.environ.get("ADVICE_STREAMING", "1").lower() not in ("0", "false", "no")
+        self.advice_edit_interval = float(os.environ.get("ADVICE_EDIT_INTERVAL") or 1.0)
+        
+        # Keep voice audio in memory buffers instead of temporary files
+        self.voice_in_memory = os.environ.get("VOICE_IN_MEMORY", "1").lower() not in ("0", "false", "no")
+        
         # Setup conversation handler
         self._setup_handlers()
     
+    def _build_application(self, token: str) -> Application:
+        """Build the telegram Application with configurable API endpoint and update queue size"""
+        builder = Application.builder().token(token)
+        
+        # TELEGRAM_BASE_URL points the bot at a local fake Bot API for load tests
+        base_url = os.environ.get("TELEGRAM_BASE_URL")
+        if base_url:
+            builder = builder.base_url(f"{base_url}/bot").base_file_url(f"{base_url}/file/bot")
+        
+        # Bounded backlog: webhook requests get a 503 (and are retried by Telegram) once this many
+        # updates are waiting on top of the CONCURRENT_UPDATES being processed
+        queue_size = int(os.environ.get("UPDATE_QUEUE_SIZE") or 1000)
+        builder = builder.update_queue(asyncio.Queue(maxsize=queue_size))
+        
+        # Conversation states and user_data survive restarts and can be shared between replicas
+        self.persistence = create_persistence(
+            os.environ.get("PERSISTENCE_BACKEND") or "sqlite",
+            path=os.environ.get("PERSISTENCE_PATH") or "bot_state.db",
+            url=os.environ.get("PERSISTENCE_URL") or "redis://localhost:6379/0",
+            update_interval=float(os.environ.get("PERSISTENCE_UPDATE_INTERVAL") or 5),
+            flush_delay=float(os.environ.get("PERSISTENCE_FLUSH_DELAY") or 0.5),
+            ttl=float(os.environ.get("PERSISTENCE_TTL") or 86400),
+            refresh_user_data=os.environ.get("PERSISTENCE_REFRESH", "0").lower() in ("1", "true", "yes")
+        )
+        if self.persistence is not None:
+            builder = builder.persistence(self.persistence)
+        
+        # Different users are served concurrently; each user's own updates stay in order
+        concurrent_updates = int(os.environ.get("CONCURRENT_UPDATES") or 32)
+        builder = builder.concurrent_updates(PerUserUpdateProcessor(concurrent_updates))
+        
+        # run_polling calls these hooks; webhook mode starts the metrics server itself
+        builder = builder.post_init(self._start_metrics_server).post_shutdown(self._stop_metrics_server)
+        
+        application = builder.build()
+        metrics.register_gauge("update_queue_size", lambda: pending_updates(application))
+        return application
+    
     def _setup_handlers(self):
         """Setup all message and command handlers"""
         # Conversation handler for data collection flow
@@ -57,7 +120,9 @@ class HealthChatBot:
             ],
             per_message=False,
             per_chat=True,
-            per_user=True
+            per_user=True,
+            name="consultation",
+            persistent=self.persistence is not None
         )
         
         self.application.add_handler(conv_handler)
@@ -215,39 +280,33 @@ class HealthChatBot:
             processing_message = MESSAGES[language_code]["processing_voice"]
             status_msg = await update.message.reply_text(processing_message)
             
-            # Download voice file
+            # Download and transcribe voice to text, showing partial transcripts of long notes
             voice_file = await update.message.voice.get_file()
+            symptoms = await self._transcribe_voice_file(
+                voice_file,
+                LANGUAGE_CODES.get(language_code, 'en'),
+                self._partial_transcript_editor(status_msg, processing_message)
+            )
             
-            # Create temporary file for voice
-            with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_file:
-                await voice_file.download_to_drive(temp_file.name)
-                temp_file_path = temp_file.name
+            if not symptoms or len(symptoms.strip()) < 5:
+                error_message = MESSAGES[language_code]["voice_transcription_failed"]
+                await status_msg.edit_text(error_message)
+                return STATES["SYMPTOMS"]
             
-            try:
-                # Transcribe voice to text
-                symptoms = await self.voice_processor.transcribe_voice(
-                    temp_file_path, 
-                    LANGUAGE_CODES.get(language_code, 'en')
-                )
-                
-                if not symptoms or len(symptoms.strip()) < 5:
-                    error_message = MESSAGES[language_code]["voice_transcription_failed"]
-                    await status_msg.edit_text(error_message)
-                    return STATES["SYMPTOMS"]
-                
-                context.user_data['symptoms'] = symptoms.strip()
-                
-                # Update status message
-                transcription_message = MESSAGES[language_code]["voice_transcribed"].format(symptoms=symptoms)
-                await status_msg.edit_text(transcription_message)
-                
-                # Process the user data
-                await self._process_user_data(update, context)
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            context.user_data['symptoms'] = symptoms.strip()
+            
+            # Update status message
+            transcription_message = MESSAGES[language_code]["voice_transcribed"].format(symptoms=symptoms)
+            await status_msg.edit_text(transcription_message)
+            
+            # Process the user data
+            await self._process_user_data(update, context)
+        
+        except WorkerPoolBusyError:
+            # Backpressure: ask the user to retry instead of queueing without bound
+            busy_message = MESSAGES[language_code]["service_busy"]
+            await status_msg.edit_text(busy_message)
+            return STATES["SYMPTOMS"]
         
         except Exception as e:
             logger.error(f"Error processing voice message: {e}")
@@ -257,6 +316,52 @@ class HealthChatBot:
         
         return ConversationHandler.END
     
+    async def _transcribe_voice_file(self, voice_file, language: str,
+                                     on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[str]:
+        """Download a Telegram voice file and transcribe it, in memory or via temp files"""
+        if self.voice_in_memory:
+            ogg_data = bytes(await self._timed_stage("download", voice_file.download_as_bytearray()))
+            return await self.voice_processor.transcribe_voice_bytes(ogg_data, language, on_partial)
+        
+        # Create temporary file for voice
+        with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_file:
+            await self._timed_stage("download", voice_file.download_to_drive(temp_file.name))
+            temp_file_path = temp_file.name
+        
+        try:
+            return await self.voice_processor.transcribe_voice(temp_file_path, language, on_partial)
+        finally:
+            # Clean up temporary file
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+    
+    def _partial_transcript_editor(self, status_msg, header: str) -> Callable[[str], Awaitable[None]]:
+        """Callback showing a partial transcript under header in the status message"""
+        last_edit = 0.0
+        
+        async def show(text: str):
+            nonlocal last_edit
+            # Same edit rate limit as streamed advice
+            now = time.monotonic()
+            if now - last_edit < self.advice_edit_interval:
+                return
+            last_edit = now
+            
+            partial = f"{header}\n\n{text} ▌"
+            if len(partial) > TELEGRAM_MESSAGE_LIMIT:
+                partial = partial[:TELEGRAM_MESSAGE_LIMIT - 1] + "…"
+            try:
+                await status_msg.edit_text(partial)
+            except RetryAfter as e:
+                # Flood control: hold further partial edits until Telegram allows them
+                last_edit = now + e.retry_after
+                logger.debug(f"Partial transcript edits paused for {e.retry_after}s")
+            except TelegramError as e:
+                # Partial text is cosmetic; the full transcript is shown once recognition ends
+                logger.debug(f"Skipped partial transcript edit: {e}")
+        
+        return show
+    
     async def _process_user_data(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Process collected user data: get AI advice, generate voice, save data"""
         language_code = context.user_data.get('language', 'en')
@@ -270,7 +375,10 @@ class HealthChatBot:
             symptoms = context.user_data['symptoms']
             language_name = context.user_data['language_name']
             
-            advice = await self.gemini_client.get_medical_advice(symptoms, language_name)
+            if self.stream_advice:
+                advice = await self._stream_advice(status_msg, language_code, symptoms, language_name)
+            else:
+                advice = await self.gemini_client.get_medical_advice(symptoms, language_name)
             
             if not advice:
                 error_message = MESSAGES[language_code]["advice_generation_failed"]
@@ -282,27 +390,8 @@ class HealthChatBot:
             # Update status
             await status_msg.edit_text(MESSAGES[language_code]["advice_generated"])
             
-            # Send text advice
-            advice_message = MESSAGES[language_code]["advice_header"] + "\n\n" + advice
-            await update.message.reply_text(advice_message)
-            
-            # Generate and send voice advice
-            voice_lang = VOICE_LANGUAGES.get(language_code, 'en')
-            voice_file_path = await self.voice_processor.text_to_speech(advice, voice_lang)
-            
-            if voice_file_path and os.path.exists(voice_file_path):
-                with open(voice_file_path, 'rb') as voice_file:
-                    voice_message = MESSAGES[language_code]["voice_advice"]
-                    await update.message.reply_voice(
-                        voice=voice_file,
-                        caption=voice_message
-                    )
-                
-                # Clean up voice file
-                os.unlink(voice_file_path)
-            
-            # Save user data to JSON
-            self.data_manager.save_user_data(context.user_data)
+            # Text reply, TTS and the disk write are independent: run them concurrently
+            await self._finish_consultation(update, context, language_code, advice)
             
             # Send completion message
             completion_message = MESSAGES[language_code]["consultation_complete"]
@@ -312,6 +401,156 @@ class HealthChatBot:
             logger.error(f"Error processing user data: {e}")
             error_message = MESSAGES[language_code]["processing_error"]
             await update.message.reply_text(error_message)
+        
+        finally:
+            # The conversation ends here: drop the intake details and symptoms so they are
+            # not kept in the persisted state (the consultation record is in the data file)
+            context.user_data.clear()
+    
+    async def _finish_consultation(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                   language_code: str, advice: str):
+        """Send text advice, synthesize and send voice advice, and save data as concurrent stages"""
+        started = time.monotonic()
+        advice_message = MESSAGES[language_code]["advice_header"] + "\n\n" + advice
+        
+        text_task = asyncio.create_task(
+            self._timed_stage("send_text", update.message.reply_text(advice_message))
+        )
+        voice_task = asyncio.create_task(
+            self._send_voice_advice(update, language_code, advice, text_task)
+        )
+        save_task = asyncio.create_task(
+            self._timed_stage("save_user_data", asyncio.to_thread(
+                self.data_manager.save_user_data, dict(context.user_data)
+            ))
+        )
+        
+        # A failing stage is logged but must not cancel the others
+        results = await asyncio.gather(text_task, voice_task, save_task, return_exceptions=True)
+        for stage, result in zip(("send_text", "voice", "save_user_data"), results):
+            if isinstance(result, Exception):
+                logger.error(f"Consultation stage {stage} failed: {result}")
+        
+        logger.info(f"Consultation finished in {time.monotonic() - started:.2f}s")
+    
+    async def _send_voice_advice(self, update: Update, language_code: str, advice: str, text_task: asyncio.Task):
+        """Synthesize voice advice and send it once the text advice has gone out"""
+        voice_lang = VOICE_LANGUAGES.get(language_code, 'en')
+        voice_message = MESSAGES[language_code]["voice_advice"]
+        
+        try:
+            await self._synthesize_and_send_voice(update, advice, voice_lang, voice_message, text_task)
+        except WorkerPoolBusyError:
+            # The text advice already covers the consultation; skip the voice copy under load
+            logger.warning("Skipping voice advice: speech worker pool is busy")
+    
+    async def _synthesize_and_send_voice(self, update: Update, advice: str, voice_lang: str,
+                                         voice_message: str, text_task: asyncio.Task):
+        """Run TTS and upload the voice advice after the text reply"""
+        # Identical advice was already uploaded once: resend by file_id, no synthesis or upload
+        file_id = self.voice_processor.get_cached_file_id(advice, voice_lang)
+        if file_id:
+            await asyncio.wait([text_task])
+            try:
+                await self._timed_stage("voice_upload", update.message.reply_voice(
+                    voice=file_id,
+                    caption=voice_message
+                ))
+                return
+            except BadRequest as e:
+                logger.warning(f"Cached voice file_id rejected, uploading again: {e}")
+        
+        if self.voice_in_memory:
+            audio_data = await self._timed_stage(
+                "tts", self.voice_processor.text_to_speech_bytes(advice, voice_lang)
+            )
+            if not audio_data:
+                return
+            
+            # Keep message order: voice goes after the text, whether or not that succeeded
+            await asyncio.wait([text_task])
+            sent_message = await self._timed_stage("voice_upload", update.message.reply_voice(
+                voice=audio_data,
+                caption=voice_message
+            ))
+            await self._remember_voice_file_id(sent_message, advice, voice_lang)
+            return
+        
+        voice_file_path = await self._timed_stage(
+            "tts", self.voice_processor.text_to_speech(advice, voice_lang)
+        )
+        
+        if not voice_file_path or not os.path.exists(voice_file_path):
+            return
+        
+        try:
+            # Keep message order: voice goes after the text, whether or not that succeeded
+            await asyncio.wait([text_task])
+            
+            with open(voice_file_path, 'rb') as voice_file:
+                sent_message = await self._timed_stage("voice_upload", update.message.reply_voice(
+                    voice=voice_file,
+                    caption=voice_message
+                ))
+            await self._remember_voice_file_id(sent_message, advice, voice_lang)
+        finally:
+            # Clean up voice file
+            os.unlink(voice_file_path)
+    
+    async def _remember_voice_file_id(self, sent_message, advice: str, voice_lang: str):
+        """Store the file_id Telegram assigned to an uploaded voice reply"""
+        media = sent_message.voice or sent_message.audio if sent_message else None
+        if media:
+            await self.voice_processor.remember_file_id(advice, voice_lang, media.file_id)
+    
+    async def _timed_stage(self, stage: str, awaitable):
+        """Await a consultation stage, log how long it took and record it in metrics"""
+        started = time.monotonic()
+        try:
+            return await awaitable
+        except Exception:
+            metrics.increment("errors_total", stage=stage)
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            metrics.observe_stage(stage, elapsed)
+            logger.info(f"Stage {stage} took {elapsed:.3f}s")
+    
+    async def _stream_advice(self, status_msg, language_code: str, symptoms: str, language_name: str) -> str:
+        """Stream advice from Gemini, showing partial text in the status message"""
+        header = MESSAGES[language_code]["advice_header"] + "\n\n"
+        fragments = []
+        next_edit = 0.0
+        started = time.monotonic()
+        first_token_logged = False
+        
+        async for fragment in self.gemini_client.stream_medical_advice(symptoms, language_name):
+            fragments.append(fragment)
+            now = time.monotonic()
+            
+            if not first_token_logged:
+                logger.info(f"First advice fragment after {now - started:.2f}s")
+                first_token_logged = True
+            
+            # Telegram rejects rapid edits of the same message, so only refresh periodically
+            if now < next_edit:
+                continue
+            next_edit = now + self.advice_edit_interval
+            
+            partial = header + "".join(fragments) + " ▌"
+            if len(partial) > TELEGRAM_MESSAGE_LIMIT:
+                partial = partial[:TELEGRAM_MESSAGE_LIMIT - 1] + "…"
+            try:
+                await status_msg.edit_text(partial)
+            except RetryAfter as e:
+                # Flood control: keep streaming, but hold edits until Telegram allows them again
+                next_edit = time.monotonic() + e.retry_after
+                logger.debug(f"Partial advice edits paused for {e.retry_after}s")
+            except TelegramError as e:
+                # e.g. "message is not modified" or a network error; the final text is sent separately
+                logger.debug(f"Skipped partial advice edit: {e}")
+        
+        return "".join(fragments).strip()
     
     async def cancel_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Handle /cancel command"""
@@ -346,6 +585,16 @@ class HealthChatBot:
         await update.message.reply_text(help_text, parse_mode='Markdown')
         return ConversationHandler.END
     
+    async def _start_metrics_server(self, application: Application):
+        """Expose /metrics when metrics are enabled"""
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+    
+    async def _stop_metrics_server(self, application: Application):
+        """Stop the /metrics server if it is running"""
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+    
     def start(self):
         """Start the bot with polling"""
         logger.info("Bot is starting with polling...")
@@ -360,7 +609,6 @@ class HealthChatBot:
             if "Conflict" in str(e):
                 logger.info("Bot conflict detected. This usually means another instance is running.")
                 logger.info("Waiting 30 seconds and retrying...")
-                import time
                 time.sleep(30)
                 try:
                     self.application.run_polling(
@@ -373,3 +621,65 @@ class HealthChatBot:
                     raise
             else:
                 raise
+        finally:
+            self.data_manager.close()
+            self.voice_processor.close()
+    
+    def start_webhook(self):
+        """Start the bot behind an aiohttp webhook server instead of polling"""
+        logger.info("Bot is starting with webhook...")
+        try:
+            asyncio.run(self._run_webhook())
+        finally:
+            self.data_manager.close()
+            self.voice_processor.close()
+    
+    async def _run_webhook(self):
+        """Serve webhooks until SIGINT/SIGTERM, then drain queued updates and shut down"""
+        path = os.environ.get("WEBHOOK_PATH") or "/telegram"
+        secret_token = os.environ.get("WEBHOOK_SECRET") or None
+        public_url = os.environ.get("WEBHOOK_URL")
+        drain_timeout = float(os.environ.get("WEBHOOK_DRAIN_TIMEOUT") or 30)
+        
+        server = WebhookServer(
+            self.application,
+            listen=os.environ.get("WEBHOOK_LISTEN") or "0.0.0.0",
+            port=int(os.environ.get("WEBHOOK_PORT") or 8443),
+            url_path=path,
+            secret_token=secret_token
+        )
+        
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                # Windows event loops have no add_signal_handler
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(stop_event.set))
+        
+        await self.application.initialize()
+        if public_url:
+            # Without WEBHOOK_URL the server still runs, e.g. behind the local load-test harness
+            await self.application.bot.set_webhook(
+                url=public_url.rstrip("/") + path,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=True
+            )
+        await self.application.start()
+        await server.start()
+        await self._start_metrics_server(self.application)
+        
+        try:
+            await stop_event.wait()
+        finally:
+            # Stop accepting first, then let the application finish everything already queued
+            logger.info(f"Draining {self.application.update_queue.qsize()} queued updates...")
+            await server.stop()
+            await self._stop_metrics_server(self.application)
+            try:
+                await asyncio.wait_for(self.application.stop(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Gave up draining updates after {drain_timeout}s")
+            await self.application.shutdown()
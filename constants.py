@@ -12,6 +12,9 @@ STATES = {
     "SYMPTOMS": 5
 }
 
+# Telegram limits
+TELEGRAM_MESSAGE_LIMIT = 4096  # Maximum characters in a single text message
+
 # Supported languages
 LANGUAGES = {
     "en": "English",
@@ -69,6 +72,7 @@ MESSAGES = {
         "voice_transcribed": "✅ Voice transcribed: {symptoms}\n\nProcessing your request...",
         "voice_transcription_failed": "❌ Could not understand the voice message. Please try again or type your symptoms.",
         "voice_processing_error": "❌ Error processing voice message. Please try typing your symptoms instead.",
+        "service_busy": "⏳ We're handling a lot of voice messages right now. Please try again in a minute or type your symptoms.",
         "generating_advice": "🔄 Generating medical advice...",
         "advice_generated": "✅ Medical advice generated!",
         "advice_generation_failed": "❌ Could not generate medical advice. Please try again later.",
@@ -93,6 +97,7 @@ MESSAGES = {
         "voice_transcribed": "✅ वॉइस ट्रांसक्राइब किया गया: {symptoms}\n\nआपका अनुरोध प्रोसेस हो रहा है...",
         "voice_transcription_failed": "❌ वॉइस मैसेज समझ नहीं आया। कृपया फिर से कोशिश करें या अपने लक्षण टाइप करें।",
         "voice_processing_error": "❌ वॉइस मैसेज प्रोसेसिंग में त्रुटि। कृपया अपने लक्षण टाइप करने का प्रयास करें।",
+        "service_busy": "⏳ अभी बहुत सारे वॉइस मैसेज प्रोसेस हो रहे हैं। कृपया एक मिनट बाद फिर से कोशिश करें या अपने लक्षण टाइप करें।",
         "generating_advice": "🔄 चिकित्सा सलाह तैयार की जा रही है...",
         "advice_generated": "✅ चिकित्सा सलाह तैयार की गई!",
         "advice_generation_failed": "❌ चिकित्सा सलाह तैयार नहीं की जा सकी। कृपया बाद में फिर से कोशिश करें।",
@@ -117,6 +122,7 @@ MESSAGES = {
         "voice_transcribed": "✅ व्हॉइस ट्रान्सक्राइब केला: {symptoms}\n\nतुमची विनंती प्रोसेस होत आहे...",
         "voice_transcription_failed": "❌ व्हॉइस मेसेज समजला नाही। कृपया पुन्हा प्रयत्न करा किंवा तुमची लक्षणे टाईप करा।",
         "voice_processing_error": "❌ व्हॉइस मेसेज प्रोसेसिंगमध्ये त्रुटी। कृपया तुमची लक्षणे टाईप करण्याचा प्रयत्न करा।",
+        "service_busy": "⏳ सध्या खूप व्हॉइस मेसेज प्रोसेस होत आहेत। कृपया एका मिनिटाने पुन्हा प्रयत्न करा किंवा तुमची लक्षणे टाईप करा।",
         "generating_advice": "🔄 वैद्यकीय सल्ला तयार केला जात आहे...",
         "advice_generated": "✅ वैद्यकीय सल्ला तयार केला!",
         "advice_generation_failed": "❌ वैद्यकीय सल्ला तयार करू शकलो नाही। कृपया नंतर पुन्हा प्रयत्न करा।",
@@ -2,43 +2,61 @@
 Data management module for storing and retrieving user health data.
 """
 
-import json
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from threading import Lock
 
+import metrics
+from storage import JsonArrayStorage, JsonLinesStorage, SqliteStorage, FSYNC_BATCH
+
 logger = logging.getLogger(__name__)
 
 class DataManager:
-    def __init__(self, data_file: str = "users.json"):
+    def __init__(self, data_file: Optional[str] = None, backend: Optional[str] = None, storage: Any = None):
         """
-        Initialize data manager with JSON file for storage.
+        Initialize data manager with a storage backend.
         
         Args:
-            data_file (str): Path to JSON file for data storage
+            data_file (str): Path to the data file (defaults per backend)
+            backend (str): "json" for the legacy JSON array file, "jsonl" for the
+                append-only JSON Lines file or "sqlite" for a SQLite database
+                (defaults to DATA_BACKEND env var)
+            storage: Ready-made backend object; overrides backend and data_file.
+                Must provide append, load_all, find_by_user, find_by_date,
+                find_by_language, statistics, file_size and close.
         """
-        self.data_file = data_file
-        self.lock = Lock()  # Thread safety for file operations
+        self.lock = Lock()  # Thread safety for storage operations
         
-        # Ensure data file exists
-        self._initialize_data_file()
-    
-    def _initialize_data_file(self):
-        """Initialize JSON data file if it doesn't exist"""
-        if not os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-                logger.info(f"Created new data file: {self.data_file}")
-            except Exception as e:
-                logger.error(f"Error creating data file: {e}")
-                raise
+        if storage is not None:
+            self.storage = storage
+            self.backend = type(storage).__name__
+            self.data_file = getattr(storage, "data_file", "")
+            return
+        
+        self.backend = (backend or os.environ.get("DATA_BACKEND") or "json").lower()
+        
+        if self.backend == "sqlite":
+            self.data_file = data_file or os.environ.get("DATA_FILE") or "users.db"
+            self.storage = SqliteStorage(self.data_file)
+        elif self.backend == "jsonl":
+            self.data_file = data_file or os.environ.get("DATA_FILE") or "users.jsonl"
+            self.storage = JsonLinesStorage(
+                self.data_file,
+                fsync_policy=os.environ.get("DATA_FSYNC_POLICY") or FSYNC_BATCH,
+                fsync_batch_size=int(os.environ.get("DATA_FSYNC_BATCH_SIZE") or 32),
+                fsync_interval=float(os.environ.get("DATA_FSYNC_INTERVAL") or 1.0)
+            )
+        elif self.backend == "json":
+            self.data_file = data_file or os.environ.get("DATA_FILE") or "users.json"
+            self.storage = JsonArrayStorage(self.data_file)
+        else:
+            raise ValueError(f"Unknown data backend: {self.backend}")
     
     def save_user_data(self, user_data: Dict[str, Any]) -> bool:
         """
-        Save user health consultation data to JSON file.
+        Save user health consultation data to the storage backend.
         
         Args:
             user_data (Dict): User data from bot conversation
@@ -47,27 +65,25 @@ class DataManager:
             bool: True if saved successfully, False otherwise
         """
         try:
+            # Prepare data record outside the lock; it touches no shared state
+            record = self._prepare_user_record(user_data)
+            
             with self.lock:
-                # Prepare data record
-                record = self._prepare_user_record(user_data)
-                
-                # Load existing data
-                existing_data = self._load_data()
-                
-                # Add new record
-                existing_data.append(record)
-                
-                # Save updated data
-                with open(self.data_file, 'w', encoding='utf-8') as f:
-                    json.dump(existing_data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Saved user data for {record['name']} (ID: {record.get('user_id', 'unknown')})")
-                return True
+                self.storage.append(record)
+            
+            logger.info(f"Saved user data for {record['name']} (ID: {record.get('user_id', 'unknown')})")
+            return True
         
         except Exception as e:
+            metrics.increment("errors_total", stage="save_user_data")
             logger.error(f"Error saving user data: {e}")
             return False
     
+    def close(self):
+        """Flush and release the storage backend"""
+        with self.lock:
+            self.storage.close()
+    
     def _prepare_user_record(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Prepare user data record for storage"""
         record = {
@@ -85,41 +101,58 @@ class DataManager:
         
         return record
     
-    def _load_data(self) -> List[Dict[str, Any]]:
-        """Load existing data from JSON file"""
+    def get_user_history(self, user_id: int) -> List[Dict[str, Any]]:
+        """
+        Get consultation history for a specific user.
+        
+        Args:
+            user_id (int): Telegram user ID
+            
+        Returns:
+            List[Dict]: List of user's consultation records
+        """
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return data
-                    else:
-                        logger.warning("Data file contains invalid format, resetting")
-                        return []
+            with self.lock:
+                return self.storage.find_by_user(user_id)
+        
+        except Exception as e:
+            logger.error(f"Error getting user history: {e}")
             return []
+    
+    def get_records_by_date(self, date: str) -> List[Dict[str, Any]]:
+        """
+        Get consultations saved on a given day.
+        
+        Args:
+            date (str): Day in YYYY-MM-DD format
+            
+        Returns:
+            List[Dict]: Consultation records from that day
+        """
+        try:
+            with self.lock:
+                return self.storage.find_by_date(date)
         
         except Exception as e:
-            logger.error(f"Error loading data: {e}")
+            logger.error(f"Error getting records by date: {e}")
             return []
     
-    def get_user_history(self, user_id: int) -> List[Dict[str, Any]]:
+    def get_records_by_language(self, language: str) -> List[Dict[str, Any]]:
         """
-        Get consultation history for a specific user.
+        Get consultations held in a given language.
         
         Args:
-            user_id (int): Telegram user ID
+            language (str): Language name, e.g. "Hindi"
             
         Returns:
-            List[Dict]: List of user's consultation records
+            List[Dict]: Consultation records in that language
         """
         try:
             with self.lock:
-                data = self._load_data()
-                user_records = [record for record in data if record.get('user_id') == user_id]
-                return user_records
+                return self.storage.find_by_language(language)
         
         except Exception as e:
-            logger.error(f"Error getting user history: {e}")
+            logger.error(f"Error getting records by language: {e}")
             return []
     
     def get_all_users(self) -> List[Dict[str, Any]]:
@@ -131,7 +164,7 @@ class DataManager:
         """
         try:
             with self.lock:
-                return self._load_data()
+                return self.storage.load_all()
         
         except Exception as e:
             logger.error(f"Error getting all users: {e}")
@@ -146,31 +179,13 @@ class DataManager:
         """
         try:
             with self.lock:
-                data = self._load_data()
-                
-                total_consultations = len(data)
-                unique_users = len(set(record.get('user_id') for record in data if record.get('user_id')))
-                
-                # Language distribution
-                languages = {}
-                for record in data:
-                    lang = record.get('language', 'Unknown')
-                    languages[lang] = languages.get(lang, 0) + 1
-                
-                # Gender distribution
-                genders = {}
-                for record in data:
-                    gender = record.get('gender', 'Unknown')
-                    genders[gender] = genders.get(gender, 0) + 1
-                
-                stats = {
-                    "total_consultations": total_consultations,
-                    "unique_users": unique_users,
-                    "language_distribution": languages,
-                    "gender_distribution": genders,
+                # Counters are maintained incrementally by the storage index
+                stats = self.storage.statistics()
+                stats.update({
                     "data_file": self.data_file,
-                    "file_size_bytes": os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
-                }
+                    "backend": self.backend,
+                    "file_size_bytes": self.storage.file_size()
+                })
                 
                 return stats
         
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Main entry point for the Telegram Health Chatbot.
-Starts the bot with polling and handles graceful shutdown.
+Starts the bot with polling (default) or a webhook server (BOT_MODE=webhook)
+and handles graceful shutdown.
 """
 
 import logging
@@ -48,7 +49,10 @@ def main():
         # Initialize and start the bot
         bot = HealthChatBot(telegram_token)
         logger.info("Starting Telegram Health Chatbot...")
-        bot.start()
+        if (os.getenv("BOT_MODE") or "polling").lower() == "webhook":
+            bot.start_webhook()
+        else:
+            bot.start()
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
         sys.exit(1)
@@ -0,0 +1,266 @@
+"""
+Per-stage latency histograms and counters exposed in Prometheus text format.
+
+Recording goes through the module-level functions below. Until configure()
+enables collection they return immediately, so instrumented code costs one
+function call and a None check when metrics are off.
+"""
+
+import bisect
+import logging
+import time
+from contextlib import nullcontext
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "healthbot_"
+
+# Upper bounds in seconds; spans fast cache hits up to the slowest Gemini/TTS calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRIPTIONS = {
+    "stage_duration_seconds": "Time spent in each consultation stage",
+    "cache_hits_total": "Lookups served from a cache",
+    "cache_misses_total": "Lookups not found in a cache",
+    "fallbacks_total": "Replies that used fallback content instead of a real answer",
+    "coalesced_requests_total": "Gemini queries answered by joining an identical in-flight request",
+    "errors_total": "Failed stages",
+    "worker_pool_rejections_total": "Jobs rejected because a worker pool was saturated",
+    "voice_rejected_total": "Voice messages without speech, rejected before speech recognition",
+    "stt_duration_seconds": "Speech recognition time per engine and language",
+    "tts_duration_seconds": "Speech synthesis time per engine and language",
+    "tts_characters_total": "Characters synthesized per engine and language",
+    "retries_total": "Retried calls to external services after transient errors",
+    "circuit_rejections_total": "Calls skipped because a circuit breaker was open",
+    "gemini_circuit_state": "Gemini circuit breaker state (0 closed, 1 half-open, 2 open)",
+    "update_queue_size": "Updates queued or being processed, as counted for webhook backpressure",
+    "gemini_model_duration_seconds": "Gemini call duration per model",
+    "gemini_tokens_total": "Gemini prompt and output tokens per model",
+    "gemini_routed_requests_total": "Gemini requests per model tier and output budget",
+    "gemini_batches_total": "Multi-prompt Gemini calls answering several queries",
+    "gemini_batched_requests_total": "Queries answered through multi-prompt Gemini calls"
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize a fixed-bucket histogram.
+
+        Args:
+            buckets (Tuple[float, ...]): Sorted bucket upper bounds
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Add one observation; caller holds the registry lock"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry of histograms, counters and gauges.
+
+        Args:
+            buckets (Tuple[float, ...]): Bucket upper bounds for every histogram
+        """
+        self.buckets = buckets
+        self.lock = Lock()
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def observe(self, name: str, value: float, labels: LabelKey):
+        """Record a histogram observation"""
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float, labels: LabelKey):
+        """Add to a counter"""
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def register_gauge(self, name: str, read: Callable[[], float]):
+        """Register a gauge whose value is read when metrics are scraped"""
+        with self.lock:
+            self.gauges[name] = read
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines: List[str] = []
+        with self.lock:
+            for name, series in sorted(self.histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+
+            for name, series in sorted(self.counters.items()):
+                self._header(lines, name, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+            gauges = sorted(self.gauges.items())
+
+        # Gauge callbacks run outside the lock so they may record metrics themselves
+        for name, read in gauges:
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning(f"Error reading gauge {name}: {e}")
+                continue
+            self._header(lines, name, "gauge")
+            lines.append(f"{PREFIX}{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str):
+        if name in DESCRIPTIONS:
+            lines.append(f"# HELP {PREFIX}{name} {DESCRIPTIONS[name]}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+_registry: Optional[MetricsRegistry] = None
+
+def configure(enabled: bool, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Optional[MetricsRegistry]:
+    """
+    Turn metric collection on or off for the whole process.
+
+    Args:
+        enabled (bool): Whether to collect metrics
+        buckets (Tuple[float, ...]): Histogram bucket upper bounds
+
+    Returns:
+        Optional[MetricsRegistry]: The active registry, or None when disabled
+    """
+    global _registry
+    _registry = MetricsRegistry(buckets) if enabled else None
+    return _registry
+
+def enabled() -> bool:
+    """Whether metrics are being collected"""
+    return _registry is not None
+
+def get_registry() -> Optional[MetricsRegistry]:
+    """The active registry, or None when disabled"""
+    return _registry
+
+def observe_stage(stage: str, seconds: float):
+    """Record how long a consultation stage took"""
+    if _registry is not None:
+        _registry.observe("stage_duration_seconds", seconds, (("stage", stage),))
+
+def observe(name: str, seconds: float, **labels: str):
+    """Record a duration in a labelled histogram, e.g. observe("gemini_model_duration_seconds", 1.2, model="...")"""
+    if _registry is not None:
+        _registry.observe(name, seconds, tuple(sorted(labels.items())))
+
+def time_stage(stage: str):
+    """
+    Context manager recording the duration of the enclosed block as a stage.
+
+    Returns a shared no-op context manager when metrics are disabled.
+    """
+    if _registry is None:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+def increment(name: str, amount: float = 1, **labels: str):
+    """Add to a counter, e.g. increment("cache_hits_total", cache="gemini")"""
+    if _registry is not None:
+        _registry.increment(name, amount, tuple(sorted(labels.items())))
+
+def register_gauge(name: str, read: Callable[[], float]):
+    """Register a gauge read at scrape time (ignored when metrics are disabled)"""
+    if _registry is not None:
+        _registry.register_gauge(name, read)
+
+def render() -> str:
+    """Current metrics in Prometheus text format (empty when disabled)"""
+    return _registry.render() if _registry is not None else ""
+
+_NULL_TIMER = nullcontext()
+
+class _StageTimer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        observe_stage(self.stage, time.perf_counter() - self.started)
+        if exc_type is not None:
+            increment("errors_total", stage=self.stage)
+        return False
+
+class MetricsServer:
+    def __init__(self, listen: str = "0.0.0.0", port: int = 9100):
+        """
+        Initialize the HTTP server exposing /metrics for Prometheus scrapes.
+
+        Args:
+            listen (str): Interface to bind
+            port (int): Port to bind
+        """
+        self.listen = listen
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the current metrics"""
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        """Start serving metrics"""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        logger.info(f"Metrics server listening on {self.listen}:{self.port}/metrics")
+
+    async def stop(self):
+        """Stop serving metrics"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,108 @@
+"""
+Micro-batching: collect concurrent requests for a short window and send them upstream together.
+"""
+
+import asyncio
+import contextlib
+import logging
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _Batch:
+    """Items collected for one send, with the futures their submitters wait on"""
+
+    def __init__(self):
+        self.items: List[Tuple[Any, asyncio.Future]] = []
+        self.full = asyncio.Event()
+
+class MicroBatcher:
+    def __init__(self, send_batch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+                 max_size: int = 8, window: float = 0.01,
+                 acquire_slot: Optional[Callable[[], AsyncContextManager]] = None):
+        """
+        Initialize the batcher.
+
+        Items submitted under the same key are collected for up to window
+        seconds after the first one (or until max_size items are waiting).
+        The batch then waits for acquire_slot, still taking new items while
+        it is not full, and is sent in one send_batch call with the slot held.
+        Each submitter gets the result at its position in the returned list.
+
+        Args:
+            send_batch (Callable): Coroutine function taking a key and a list of items
+                and returning one result per item
+            max_size (int): Items per batch
+            window (float): Shortest time in seconds the first item of a batch waits
+            acquire_slot (Callable): Returns an async context manager held while sending,
+                e.g. a concurrency limit; batches keep filling while they wait for it
+        """
+        self.send_batch = send_batch
+        self.max_size = max(1, max_size)
+        self.window = window
+        self.acquire_slot = acquire_slot or contextlib.nullcontext
+        self.queued = 0  # Items submitted but not yet sent
+        self._open: Dict[Hashable, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """
+        Add an item to the open batch for key and wait for its result.
+
+        Args:
+            key (Hashable): Items are only batched with items of the same key
+            item (Any): Item passed to send_batch
+
+        Returns:
+            Any: send_batch's result for this item
+
+        Raises:
+            Exception: Whatever send_batch raised for the whole batch
+        """
+        batch = self._open.get(key)
+        if batch is None:
+            batch = self._open[key] = _Batch()
+            task = asyncio.create_task(self._dispatch(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        future = asyncio.get_running_loop().create_future()
+        batch.items.append((item, future))
+        self.queued += 1
+        if len(batch.items) >= self.max_size:
+            self._close(key, batch)
+
+        return await future
+
+    def _close(self, key: Hashable, batch: _Batch):
+        """Stop adding items to batch"""
+        if self._open.get(key) is batch:
+            del self._open[key]
+        batch.full.set()
+
+    async def _dispatch(self, key: Hashable, batch: _Batch):
+        try:
+            try:
+                await asyncio.wait_for(batch.full.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+
+            async with self.acquire_slot():
+                self._close(key, batch)
+                self.queued -= len(batch.items)
+                results = await self.send_batch(key, [item for item, _ in batch.items])
+        except asyncio.CancelledError:
+            for _, future in batch.items:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch.items):
+            logger.error(f"Batch of {len(batch.items)} items returned {len(results)} results")
+        for index, (_, future) in enumerate(batch.items):
+            if not future.done():
+                future.set_result(results[index] if index < len(results) else None)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Offline migration and compaction tool for consultation data files.
+
+Stop the bot before running this; it rewrites data files in place.
+
+Usage:
+    python migrate_data.py jsonl users.json users.jsonl   # convert legacy JSON array
+    python migrate_data.py compact users.jsonl            # drop torn/corrupt lines
+    python migrate_data.py sqlite users.json users.db     # import into SQLite
+"""
+
+import argparse
+import logging
+import sys
+
+from storage import compact_to_jsonl, import_to_sqlite
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+
+logger = logging.getLogger(__name__)
+
+def main():
+    """Parse command line arguments and run the requested migration"""
+    parser = argparse.ArgumentParser(description="Migrate or compact consultation data files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    jsonl_parser = subparsers.add_parser("jsonl", help="Convert a users.json array into JSON Lines")
+    jsonl_parser.add_argument("source", help="Legacy JSON array file")
+    jsonl_parser.add_argument("target", help="JSON Lines file to create")
+    
+    compact_parser = subparsers.add_parser("compact", help="Rewrite a JSON Lines file without corrupt lines")
+    compact_parser.add_argument("path", help="JSON Lines file to compact in place")
+    
+    sqlite_parser = subparsers.add_parser("sqlite", help="Import a JSON or JSON Lines file into SQLite")
+    sqlite_parser.add_argument("source", help="users.json or users.jsonl file")
+    sqlite_parser.add_argument("target", help="SQLite database to create or append to")
+    
+    args = parser.parse_args()
+    
+    try:
+        if args.command == "jsonl":
+            count = compact_to_jsonl(args.source, args.target)
+        elif args.command == "sqlite":
+            count = import_to_sqlite(args.source, args.target)
+        else:
+            count = compact_to_jsonl(args.path)
+        logger.info(f"Done: {count} records")
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Model tier and output budget selection for Gemini requests.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+FAST = "fast"
+
+# Devanagari text costs noticeably more tokens per word than English, so the
+# same ~300 word answer needs a larger output budget to avoid truncation
+LANGUAGE_TOKEN_FACTORS = {
+    "English": 1.0,
+    "Hindi": 1.6,
+    "Marathi": 1.8
+}
+
+class ModelRouter:
+    def __init__(self, primary_model: str = "gemini-2.5-flash", fast_model: Optional[str] = "gemini-2.5-flash-lite",
+                 max_output_tokens: int = 500, reduced_output_tokens: int = 300,
+                 busy_load: float = 1.0, overload_load: float = 2.0, long_symptoms_chars: int = 300):
+        """
+        Initialize the router.
+
+        Load is the number of Gemini requests queued or in flight divided by
+        the concurrency limit. Below busy_load every query gets the primary
+        model and the full budget. Between busy_load and overload_load short
+        symptom descriptions move to the fast model, while long ones keep the
+        primary model with a reduced budget. From overload_load on, every
+        query gets the fast model with the reduced budget.
+
+        Args:
+            primary_model (str): Default model
+            fast_model (str): Cheaper, faster model for peaks, or None to always use the primary one
+            max_output_tokens (int): Output budget for English at normal load
+            reduced_output_tokens (int): Output budget for English under load
+            busy_load (float): Load from which answers are degraded
+            overload_load (float): Load from which every answer is degraded
+            long_symptoms_chars (int): Symptom length that counts as a detailed description
+        """
+        self.primary_model = primary_model
+        self.fast_model = fast_model or primary_model
+        self.max_output_tokens = max_output_tokens
+        self.reduced_output_tokens = reduced_output_tokens
+        self.busy_load = busy_load
+        self.overload_load = overload_load
+        self.long_symptoms_chars = long_symptoms_chars
+
+    def route(self, symptoms: str, language: str, load: float) -> Dict[str, Any]:
+        """
+        Pick the model and output budget for one query.
+
+        Args:
+            symptoms (str): User's reported symptoms
+            language (str): Response language name
+            load (float): Queued plus in-flight Gemini requests per concurrency slot
+
+        Returns:
+            Dict[str, Any]: tier, model, max_output_tokens and max_words (answer length for the prompt)
+        """
+        detailed = len(symptoms) >= self.long_symptoms_chars
+        if load < self.busy_load:
+            tier, model, reduced = PRIMARY, self.primary_model, False
+        elif load < self.overload_load and detailed:
+            tier, model, reduced = PRIMARY, self.primary_model, True
+        else:
+            tier, model, reduced = FAST, self.fast_model, load >= self.overload_load or detailed
+
+        budget = self.reduced_output_tokens if reduced else self.max_output_tokens
+        return {
+            "tier": tier,
+            "model": model,
+            "reduced": reduced,
+            "max_output_tokens": int(budget * LANGUAGE_TOKEN_FACTORS.get(language, 1.5)),
+            # Ask for a length that fits the budget so answers are not cut off mid-sentence
+            "max_words": max(100, 300 * budget // self.max_output_tokens)
+        }
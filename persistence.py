@@ -0,0 +1,327 @@
+"""
+Persistent conversation state and user_data shared through a key-value store.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+USER_DATA = "user_data"
+CONVERSATIONS = "conversations"
+
+# user_data keys only used within the update that sets them; health details are not written to the store
+TRANSIENT_USER_DATA = ("symptoms", "advice")
+
+class KeyValueStore(ABC):
+    """Minimal storage interface the persistence layer needs.
+
+    Values are JSON strings grouped by namespace. Implement this to plug in a
+    Redis-like shared store so several bot replicas see the same state.
+    Entries not written for ttl seconds expire, so abandoned intake answers
+    are not kept forever. Calls block; the persistence layer runs them in a
+    thread.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        """Return one value or None"""
+
+    @abstractmethod
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        """Return every key/value pair in a namespace"""
+
+    @abstractmethod
+    def write_batch(self, upserts: List[Tuple[str, str, str]], deletes: List[Tuple[str, str]]):
+        """Apply (namespace, key, value) upserts and (namespace, key) deletes atomically"""
+
+    def close(self):
+        """Release resources"""
+
+class SqliteKeyValueStore(KeyValueStore):
+    def __init__(self, path: str = "bot_state.db", ttl: Optional[float] = None):
+        """
+        Initialize a SQLite-backed key-value store.
+
+        Args:
+            path (str): SQLite database file; replicas on one host may share it
+            ttl (float): Seconds an entry is kept after its last write; None keeps entries forever
+        """
+        self.path = path
+        self.ttl = ttl
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS kv (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                "value TEXT NOT NULL, updated_at REAL NOT NULL DEFAULT 0, PRIMARY KEY (namespace, key))"
+            )
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(kv)")]
+            if "updated_at" not in columns:
+                # Stores created before expiry: start their entries' TTL now
+                self.connection.execute("ALTER TABLE kv ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+                self.connection.execute("UPDATE kv SET updated_at = ?", (time.time(),))
+
+    def _cutoff(self) -> float:
+        """Entries last written before this time have expired"""
+        return time.time() - self.ttl if self.ttl else 0
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM kv WHERE namespace = ? AND key = ? AND updated_at >= ?",
+                (namespace, key, self._cutoff())
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key, value FROM kv WHERE namespace = ? AND updated_at >= ?", (namespace, self._cutoff())
+            )
+            return dict(rows.fetchall())
+
+    def write_batch(self, upserts: List[Tuple[str, str, str]], deletes: List[Tuple[str, str]]):
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                [(namespace, key, value, now) for namespace, key, value in upserts]
+            )
+            self.connection.executemany("DELETE FROM kv WHERE namespace = ? AND key = ?", deletes)
+            # Only conversations in progress live here, so sweeping expired rows on each write is cheap
+            self.connection.execute("DELETE FROM kv WHERE updated_at < ?", (self._cutoff(),))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class RedisKeyValueStore(KeyValueStore):
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "healthbot",
+                 ttl: Optional[float] = None):
+        """
+        Initialize a Redis-backed key-value store (one Redis key per entry, so each can expire).
+
+        Requires the optional ``redis`` package.
+
+        Args:
+            url (str): Redis connection URL
+            prefix (str): Key prefix so several bots can share one Redis
+            ttl (float): Seconds an entry is kept after its last write; None keeps entries forever
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisKeyValueStore requires the 'redis' package") from e
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return self.client.get(self._key(namespace, key))
+
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        prefix = self._key(namespace, "")
+        redis_keys = list(self.client.scan_iter(match=f"{prefix}*"))
+        values = self.client.mget(redis_keys) if redis_keys else []
+        return {redis_key[len(prefix):]: value for redis_key, value in zip(redis_keys, values) if value is not None}
+
+    def write_batch(self, upserts: List[Tuple[str, str, str]], deletes: List[Tuple[str, str]]):
+        pipeline = self.client.pipeline(transaction=True)
+        expire = int(self.ttl) if self.ttl else None
+        for namespace, key, value in upserts:
+            pipeline.set(self._key(namespace, key), value, ex=expire)
+        for namespace, key in deletes:
+            pipeline.delete(self._key(namespace, key))
+        pipeline.execute()
+
+    def close(self):
+        self.client.close()
+
+class KeyValuePersistence(BasePersistence):
+    def __init__(self, store: KeyValueStore, update_interval: float = 5, flush_delay: float = 0.5,
+                 refresh_user_data: bool = False):
+        """
+        Persist ConversationHandler states and user_data in a KeyValueStore.
+
+        Only intake answers of conversations in progress are stored: symptoms
+        and advice are never written, and a user's row is deleted once their
+        user_data is cleared at the end of a consultation, /cancel or /start.
+        Abandoned conversations expire after the store's ttl.
+
+        PTB already batches persistence calls every update_interval seconds;
+        on top of that, every change arriving within flush_delay seconds is
+        written to the store in one batch, so a burst of state transitions in
+        handle_name/handle_age/handle_phone costs a single write.
+
+        Args:
+            store (KeyValueStore): Backing store
+            update_interval (float): Seconds between PTB persistence runs
+            flush_delay (float): Seconds to collect changes before writing them
+            refresh_user_data (bool): Load a user's data from the store when this
+                process has none for them yet, so a replica can pick up a conversation
+                another replica started (one read per such update)
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.store = store
+        self.flush_delay = flush_delay
+        self.refresh_from_store = refresh_user_data
+
+        self._pending: Dict[Tuple[str, str], Optional[str]] = {}  # None marks a delete
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Store calls run in a thread; the lock keeps batches in the order they were started
+        self._write_lock = asyncio.Lock()
+        self._write_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _conversation_key(name: str, key: Tuple[Any, ...]) -> str:
+        return json.dumps([name, list(key)])
+
+    def _queue_write(self, namespace: str, key: str, value: Optional[str]):
+        """Record a change and make sure a coalesced flush is scheduled"""
+        self._pending[(namespace, key)] = value
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_write)
+
+    def _start_write(self):
+        """Timer callback: write the collected changes without blocking the event loop"""
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self._write_pending())
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _write_pending(self):
+        """Write all collected changes in one batch"""
+        async with self._write_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+            upserts = [(ns, key, value) for (ns, key), value in pending.items() if value is not None]
+            deletes = [(ns, key) for (ns, key), value in pending.items() if value is None]
+            try:
+                await asyncio.to_thread(self.store.write_batch, upserts, deletes)
+            except Exception as e:
+                logger.error(f"Error writing persistent state, will retry: {e}")
+                # Keep newer changes that arrived meanwhile, retry on the next change or flush
+                for item, value in pending.items():
+                    self._pending.setdefault(item, value)
+
+    # user_data ------------------------------------------------------------
+
+    async def get_user_data(self) -> Dict[int, Dict[Any, Any]]:
+        stored = await asyncio.to_thread(self.store.get_all, USER_DATA)
+        return {int(user_id): json.loads(value) for user_id, value in stored.items()}
+
+    async def update_user_data(self, user_id: int, data: Dict[Any, Any]) -> None:
+        stored = {key: value for key, value in data.items() if key not in TRANSIENT_USER_DATA}
+        # Finished or cancelled conversations clear user_data; remove the row rather than keep "{}"
+        self._queue_write(USER_DATA, str(user_id), json.dumps(stored, ensure_ascii=False) if stored else None)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._queue_write(USER_DATA, str(user_id), None)
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[Any, Any]) -> None:
+        # Only fill empty data: local data may be newer than the last persisted copy
+        if not self.refresh_from_store or user_data:
+            return
+        value = await asyncio.to_thread(self.store.get, USER_DATA, str(user_id))
+        if value is not None:
+            user_data.clear()
+            user_data.update(json.loads(value))
+
+    # conversations ----------------------------------------------------------
+
+    async def get_conversations(self, name: str) -> Dict[Tuple[Any, ...], object]:
+        conversations = {}
+        stored = await asyncio.to_thread(self.store.get_all, CONVERSATIONS)
+        for stored_key, value in stored.items():
+            conversation_name, key = json.loads(stored_key)
+            if conversation_name == name:
+                conversations[tuple(key)] = json.loads(value)
+        return conversations
+
+    async def update_conversation(self, name: str, key: Tuple[Any, ...], new_state: Optional[object]) -> None:
+        stored_key = self._conversation_key(name, key)
+        self._queue_write(CONVERSATIONS, stored_key, None if new_state is None else json.dumps(new_state))
+
+    # Not stored: the bot only keeps state in user_data and conversations ----
+
+    async def get_chat_data(self) -> Dict[int, Any]:
+        return {}
+
+    async def update_chat_data(self, chat_id: int, data: Any) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Any) -> None:
+        pass
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def update_bot_data(self, data: Any) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Any) -> None:
+        pass
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Write outstanding changes immediately (called on shutdown)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._write_tasks:
+            await asyncio.gather(*self._write_tasks)
+        await self._write_pending()
+        await asyncio.to_thread(self.store.close)
+
+def create_persistence(backend: str, **options) -> Optional[KeyValuePersistence]:
+    """
+    Build the persistence layer for a backend name.
+
+    Args:
+        backend (str): "sqlite", "redis" or "none"
+        **options: path (sqlite), url (redis), ttl (both) and KeyValuePersistence keyword arguments
+
+    Returns:
+        Optional[KeyValuePersistence]: Persistence instance, or None when disabled
+    """
+    backend = backend.lower()
+    path = options.pop("path", "bot_state.db")
+    url = options.pop("url", "redis://localhost:6379/0")
+    ttl = options.pop("ttl", None) or None
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return KeyValuePersistence(SqliteKeyValueStore(path, ttl=ttl), **options)
+    if backend == "redis":
+        return KeyValuePersistence(RedisKeyValueStore(url, ttl=ttl), **options)
+    raise ValueError(f"Unknown persistence backend: {backend}")
@@ -0,0 +1,174 @@
+"""
+Rate limiting, retry backoff and circuit breaking for calls to external APIs.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding for the circuit state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt (int): Retry number, starting at 0
+        base_delay (float): Delay ceiling of the first retry in seconds
+        max_delay (float): Upper bound for any delay in seconds
+
+    Returns:
+        float: Seconds to wait before the retry
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when waiting for a rate limit token would exceed the caller's deadline"""
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a token bucket rate limiter.
+
+        Args:
+            rate (float): Tokens added per second; 0 or less disables limiting
+            capacity (float): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting for the bucket to refill if needed.
+
+        Tokens are reserved up front, so concurrent callers queue fairly
+        instead of all waking at once.
+
+        Args:
+            max_wait (float): Give up instead of waiting longer than this many seconds
+
+        Returns:
+            bool: True if a token was taken, False if it would take longer than max_wait
+        """
+        if not self.enabled:
+            return True
+
+        self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if max_wait is not None and wait > max_wait:
+            return False
+
+        self.tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: float = 0.5, window: int = 20,
+                 min_calls: int = 10, reset_timeout: float = 30.0):
+        """
+        Initialize an error-rate circuit breaker.
+
+        Closed: calls pass and outcomes are recorded over the last `window`
+        calls. Once at least `min_calls` are recorded and the failure ratio
+        reaches `failure_threshold`, the breaker opens and calls are rejected
+        without being attempted. After `reset_timeout` seconds one probe call
+        is let through (half-open); its outcome closes or re-opens the breaker.
+
+        Args:
+            name (str): Name used in logs
+            failure_threshold (float): Failure ratio that opens the breaker; 0 disables it
+            window (int): Number of recent calls considered
+            min_calls (int): Calls needed before the ratio is trusted
+            reset_timeout (float): Seconds to stay open before probing
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._outcomes: deque = deque(maxlen=window)  # True for failures
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a call may be attempted now"""
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        """Record a successful call"""
+        if self.state == HALF_OPEN:
+            self._outcomes.clear()
+            self._transition(CLOSED)
+        self._probe_in_flight = False
+        self._outcomes.append(False)
+
+    def record_failure(self):
+        """Record a failed call (after any retries)"""
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+
+        self._outcomes.append(True)
+        if self.state == CLOSED and self.failure_threshold > 0 and len(self._outcomes) >= self.min_calls:
+            if sum(self._outcomes) / len(self._outcomes) >= self.failure_threshold:
+                self._open()
+
+    def release_probe(self):
+        """Give the half-open probe slot back when a call ended without an outcome"""
+        self._probe_in_flight = False
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            level = logging.WARNING if state == OPEN else logging.INFO
+            logger.log(level, f"Circuit breaker {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state for monitoring"""
+        failures = sum(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failure_ratio": failures / len(self._outcomes) if self._outcomes else 0.0,
+            "rejected": self.rejected
+        }
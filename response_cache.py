@@ -0,0 +1,219 @@
+"""
+Response cache for repeated medical advice queries.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalize_symptoms(symptoms: str) -> str:
+    """
+    Normalize symptom text so trivially different phrasings share a cache key.
+
+    Applies Unicode NFKC normalization, case folding, drops punctuation
+    (including the Devanagari danda "।") and collapses whitespace.
+
+    Args:
+        symptoms (str): Raw symptom text from the user
+
+    Returns:
+        str: Normalized symptom text
+    """
+    text = unicodedata.normalize("NFKC", symptoms).casefold()
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return re.sub(r"\s+", " ", text).strip()
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400.0, persist_path: Optional[str] = None,
+                 purge_every: int = 256):
+        """
+        Initialize an LRU cache with per-entry TTL and an optional SQLite disk tier.
+
+        Expired disk entries are purged when the cache opens and after every
+        purge_every writes, so the file does not grow without bound.
+
+        Args:
+            max_entries (int): Maximum entries held in memory before LRU eviction
+            ttl (float): Seconds an entry stays valid
+            persist_path (str): SQLite file for the persistent tier, or None for memory only
+            purge_every (int): Disk writes between purges of expired entries
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.purge_every = purge_every
+        self.lock = Lock()
+        self._writes = 0
+
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            removed = self.purge_expired()
+            if removed:
+                logger.info(f"Purged {removed} expired cached responses from {persist_path}")
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a fixed-size cache key from its components"""
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            Optional[str]: Cached value, or None on a miss or expired entry
+        """
+        value = self._get_memory(key)
+        return value if value is not None else self._get_disk(key)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get() for the event loop: memory hits return directly, disk lookups run in a thread"""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        if self._db is None:
+            return self._get_disk(key)
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def set(self, key: str, value: str):
+        """
+        Store a response in memory and, if configured, on disk.
+
+        Args:
+            key (str): Cache key from make_key
+            value (str): Response to cache
+        """
+        expires_at = time.time() + self.ttl
+        self._set_memory(key, value, expires_at)
+        self._set_disk(key, value, expires_at)
+
+    async def set_async(self, key: str, value: str):
+        """set() for the event loop: the disk write runs in a thread"""
+        expires_at = time.time() + self.ttl
+        self._set_memory(key, value, expires_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, expires_at)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        """Memory tier lookup; counts hits only"""
+        now = time.time()
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        """Disk tier lookup after a memory miss; counts the hit or miss"""
+        now = time.time()
+        with self.lock:
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def _set_memory(self, key: str, value: str, expires_at: float):
+        with self.lock:
+            self._remember(key, value, expires_at)
+
+    def _set_disk(self, key: str, value: str, expires_at: float):
+        """Write to the disk tier, purging expired entries every purge_every writes"""
+        with self.lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error persisting cached response: {e}")
+                return
+            self._writes += 1
+            purge = self.purge_every > 0 and self._writes % self.purge_every == 0
+
+        if purge:
+            try:
+                removed = self.purge_expired()
+                logger.info(f"Purged {removed} expired cached responses")
+            except sqlite3.Error as e:
+                logger.error(f"Error purging expired cached responses: {e}")
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers and return how many were removed"""
+        now = time.time()
+        with self.lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            removed = len(expired)
+
+            if self._db is not None:
+                cursor = self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                self._db.commit()
+                removed += cursor.rowcount
+
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current memory tier size"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries)
+            }
+
+    def close(self):
+        """Close the persistent tier"""
+        with self.lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
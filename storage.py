@@ -0,0 +1,517 @@
+"""
+Storage backends for consultation records used by DataManager.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from threading import Lock, Timer
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fsync policies for the append-only JSON Lines backend
+FSYNC_ALWAYS = "always"  # fsync after every record (safest, slowest)
+FSYNC_BATCH = "batch"    # fsync after N records or within T seconds, whichever comes first
+FSYNC_NEVER = "never"    # leave flushing to the OS page cache
+
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NEVER)
+
+class RecordIndex:
+    """Secondary indexes and running aggregates over stored records.
+
+    Positions are whatever the owning backend uses to fetch a record again
+    (a list index or a byte offset), so lookups cost O(matching records).
+    """
+
+    def __init__(self):
+        self.by_user: Dict[Any, List[int]] = defaultdict(list)
+        self.by_date: Dict[str, List[int]] = defaultdict(list)
+        self.by_language: Dict[Any, List[int]] = defaultdict(list)
+        self.total = 0
+        self.languages: Counter = Counter()
+        self.genders: Counter = Counter()
+
+    def add(self, record: Dict[str, Any], position: int):
+        """Index a record stored at position"""
+        self.total += 1
+
+        user_id = record.get('user_id')
+        if user_id:
+            self.by_user[user_id].append(position)
+
+        date = record.get('date')
+        if isinstance(date, str):
+            self.by_date[date[:10]].append(position)
+
+        language = record.get('language', 'Unknown')
+        self.by_language[language].append(position)
+        self.languages[language] += 1
+        self.genders[record.get('gender', 'Unknown')] += 1
+
+    def statistics(self) -> Dict[str, Any]:
+        """Aggregate counters, maintained incrementally so this is O(1) in record count"""
+        return {
+            "total_consultations": self.total,
+            "unique_users": len(self.by_user),
+            "language_distribution": dict(self.languages),
+            "gender_distribution": dict(self.genders)
+        }
+
+class JsonArrayStorage:
+    """Legacy backend: the whole dataset is one pretty-printed JSON array."""
+
+    def __init__(self, data_file: str = "users.json"):
+        """
+        Initialize JSON array storage.
+
+        Args:
+            data_file (str): Path to JSON file for data storage
+        """
+        self.data_file = data_file
+        self._initialize_data_file()
+
+        # The array is rewritten on every save anyway, so keep it in memory for queries
+        self._records = self._read_file()
+        self.index = RecordIndex()
+        for position, record in enumerate(self._records):
+            self.index.add(record, position)
+
+    def _initialize_data_file(self):
+        """Initialize JSON data file if it doesn't exist"""
+        if not os.path.exists(self.data_file):
+            try:
+                with open(self.data_file, 'w', encoding='utf-8') as f:
+                    json.dump([], f, ensure_ascii=False, indent=2)
+                logger.info(f"Created new data file: {self.data_file}")
+            except Exception as e:
+                logger.error(f"Error creating data file: {e}")
+                raise
+
+    def append(self, record: Dict[str, Any]):
+        """Append a record by rewriting the whole array (O(N) per save)"""
+        record = dict(record)
+        self._records.append(record)
+        try:
+            with open(self.data_file, 'w', encoding='utf-8') as f:
+                json.dump(self._records, f, ensure_ascii=False, indent=2)
+        except Exception:
+            self._records.pop()
+            raise
+
+        self.index.add(record, len(self._records) - 1)
+
+    def _read_file(self) -> List[Dict[str, Any]]:
+        """Load existing data from JSON file"""
+        try:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    if isinstance(data, list):
+                        return data
+                    else:
+                        logger.warning("Data file contains invalid format, resetting")
+                        return []
+            return []
+
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+            return []
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Copies of all records in insertion order, so callers cannot change the cached data"""
+        return [dict(record) for record in self._records]
+
+    def _fetch(self, positions: List[int]) -> List[Dict[str, Any]]:
+        """Copies of the records at the given list positions"""
+        return [dict(self._records[position]) for position in positions]
+
+    def find_by_user(self, user_id: Any) -> List[Dict[str, Any]]:
+        """Records for one user, via the user_id index"""
+        return self._fetch(self.index.by_user.get(user_id, []))
+
+    def find_by_date(self, date: str) -> List[Dict[str, Any]]:
+        """Records saved on a given YYYY-MM-DD day, via the date index"""
+        return self._fetch(self.index.by_date.get(date, []))
+
+    def find_by_language(self, language: str) -> List[Dict[str, Any]]:
+        """Records in a given language, via the language index"""
+        return self._fetch(self.index.by_language.get(language, []))
+
+    def statistics(self) -> Dict[str, Any]:
+        """Aggregate counters from the index"""
+        return self.index.statistics()
+
+    def file_size(self) -> int:
+        """Size of the backing file in bytes"""
+        return os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+
+    def close(self):
+        """Nothing to release; every write closes its own file handle"""
+
+class JsonLinesStorage:
+    """Append-only backend: one JSON record per line, saves are O(1)."""
+
+    def __init__(self, data_file: str = "users.jsonl", fsync_policy: str = FSYNC_BATCH,
+                 fsync_batch_size: int = 32, fsync_interval: float = 1.0):
+        """
+        Initialize JSON Lines storage.
+
+        Args:
+            data_file (str): Path to JSON Lines file for data storage
+            fsync_policy (str): One of "always", "batch" or "never"
+            fsync_batch_size (int): Records written before a forced fsync in batch mode
+            fsync_interval (float): Seconds within which pending records are fsynced in batch mode,
+                even if no further record arrives
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+
+        self.data_file = data_file
+        self.fsync_policy = fsync_policy
+        self.fsync_batch_size = max(1, fsync_batch_size)
+        self.fsync_interval = fsync_interval
+
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Background fsync for records still pending after fsync_interval; guards the
+        # write handle against the timer thread
+        self._sync_lock = Lock()
+        self._sync_timer: Optional[Timer] = None
+        self._handle = open(self.data_file, 'ab')
+        self._terminate_torn_tail()
+
+        # One pass at startup builds byte-offset indexes; appends keep them current
+        self.index = RecordIndex()
+        for offset, record in iter_jsonl_with_offsets(self.data_file):
+            self.index.add(record, offset)
+        self._reader = open(self.data_file, 'rb')
+
+    def _terminate_torn_tail(self):
+        """Start on a fresh line if a previous crash left a partial record"""
+        if self._handle.tell() == 0:
+            return
+        with open(self.data_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                logger.warning(f"Data file {self.data_file} ends with a partial record")
+                self._handle.write(b"\n")
+                self._handle.flush()
+
+    def append(self, record: Dict[str, Any]):
+        """Append a single record to the end of the file"""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with self._sync_lock:
+            offset = self._handle.tell()
+            self._handle.write(line.encode('utf-8') + b"\n")
+            self._handle.flush()
+            self._pending += 1
+            self.index.add(record, offset)
+
+            if self.fsync_policy == FSYNC_ALWAYS:
+                self._sync()
+            elif self.fsync_policy == FSYNC_BATCH:
+                if (self._pending >= self.fsync_batch_size
+                        or time.monotonic() - self._last_sync >= self.fsync_interval):
+                    self._sync()
+                elif self._sync_timer is None:
+                    # A quiet period must not leave this record unsynced past the interval
+                    self._sync_timer = Timer(self.fsync_interval, self._sync_pending)
+                    self._sync_timer.daemon = True
+                    self._sync_timer.start()
+
+    def _sync(self):
+        """Force pending writes to disk; caller holds the sync lock"""
+        os.fsync(self._handle.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+
+    def _sync_pending(self):
+        """Timer callback: fsync records still pending after fsync_interval"""
+        with self._sync_lock:
+            self._sync_timer = None
+            if self._pending and not self._handle.closed:
+                try:
+                    self._sync()
+                except OSError as e:
+                    logger.error(f"Background fsync of {self.data_file} failed: {e}")
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield records in insertion order, skipping torn or corrupt lines"""
+        return iter_jsonl(self.data_file)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Load every record from the JSON Lines file"""
+        try:
+            return list(self.iter_records())
+
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+            return []
+
+    def _fetch(self, offsets: List[int]) -> List[Dict[str, Any]]:
+        """Read the records starting at the given byte offsets"""
+        records = []
+        for offset in offsets:
+            self._reader.seek(offset)
+            records.append(json.loads(self._reader.readline()))
+        return records
+
+    def find_by_user(self, user_id: Any) -> List[Dict[str, Any]]:
+        """Records for one user, via the user_id index"""
+        return self._fetch(self.index.by_user.get(user_id, []))
+
+    def find_by_date(self, date: str) -> List[Dict[str, Any]]:
+        """Records saved on a given YYYY-MM-DD day, via the date index"""
+        return self._fetch(self.index.by_date.get(date, []))
+
+    def find_by_language(self, language: str) -> List[Dict[str, Any]]:
+        """Records in a given language, via the language index"""
+        return self._fetch(self.index.by_language.get(language, []))
+
+    def statistics(self) -> Dict[str, Any]:
+        """Aggregate counters from the index"""
+        return self.index.statistics()
+
+    def file_size(self) -> int:
+        """Size of the backing file in bytes"""
+        return os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+
+    def close(self):
+        """Fsync outstanding writes, stop the background fsync and close the file handles"""
+        with self._sync_lock:
+            if self._handle.closed:
+                return
+            if self._pending and self.fsync_policy != FSYNC_NEVER:
+                self._sync()
+            self._handle.close()
+            self._reader.close()
+
+class SqliteStorage:
+    """SQLite backend: WAL mode, one reused connection, indexed queries."""
+
+    COLUMNS = ("user_id", "username", "name", "age", "phone", "gender",
+               "language", "symptoms", "advice", "date")
+
+    INSERT_SQL = (
+        "INSERT INTO consultations (user_id, username, name, age, phone, gender, "
+        "language, symptoms, advice, date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    COUNT_SQL = (
+        "INSERT INTO consultation_counts (kind, key, count) VALUES (?, ?, 1) "
+        "ON CONFLICT (kind, key) DO UPDATE SET count = count + 1"
+    )
+    SELECT_SQL = "SELECT user_id, username, name, age, phone, gender, language, symptoms, advice, date FROM consultations"
+
+    def __init__(self, data_file: str = "users.db"):
+        """
+        Initialize SQLite storage.
+
+        Args:
+            data_file (str): Path to the SQLite database file
+        """
+        self.data_file = data_file
+        # One connection for the process; DataManager's lock serializes access across threads
+        self.connection = sqlite3.connect(data_file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist"""
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS consultations (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER, username TEXT, name TEXT, age INTEGER, phone TEXT,
+                    gender TEXT, language TEXT, symptoms TEXT, advice TEXT, date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_consultations_user_id ON consultations (user_id);
+                CREATE INDEX IF NOT EXISTS idx_consultations_date ON consultations (date);
+                CREATE INDEX IF NOT EXISTS idx_consultations_language ON consultations (language);
+
+                -- Aggregates kept in step with inserts so statistics never scan consultations
+                CREATE TABLE IF NOT EXISTS consultation_counts (
+                    kind TEXT NOT NULL, key TEXT, count INTEGER NOT NULL,
+                    PRIMARY KEY (kind, key)
+                );
+                CREATE TABLE IF NOT EXISTS consultation_users (user_id INTEGER PRIMARY KEY);
+            """)
+
+    def _row(self, record: Dict[str, Any]) -> Tuple:
+        """Column values for a record, in INSERT_SQL order"""
+        return tuple(record.get(column) for column in self.COLUMNS)
+
+    def _count(self, record: Dict[str, Any]):
+        """Update aggregate counters for one record; caller owns the transaction"""
+        self.connection.execute(self.COUNT_SQL, ("total", ""))
+        self.connection.execute(self.COUNT_SQL, ("language", record.get('language', 'Unknown')))
+        self.connection.execute(self.COUNT_SQL, ("gender", record.get('gender', 'Unknown')))
+        if record.get('user_id'):
+            self.connection.execute(
+                "INSERT OR IGNORE INTO consultation_users (user_id) VALUES (?)", (record['user_id'],)
+            )
+
+    def append(self, record: Dict[str, Any]):
+        """Insert a record and update counters in one transaction"""
+        with self.connection:
+            self.connection.execute(self.INSERT_SQL, self._row(record))
+            self._count(record)
+
+    def append_many(self, records: Iterator[Dict[str, Any]]) -> int:
+        """Bulk insert records in a single transaction (used by the importer)"""
+        count = 0
+        with self.connection:
+            for record in records:
+                self.connection.execute(self.INSERT_SQL, self._row(record))
+                self._count(record)
+                count += 1
+        return count
+
+    def _query(self, where: str = "", params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Run SELECT_SQL with an optional WHERE clause and return records as dicts"""
+        rows = self.connection.execute(f"{self.SELECT_SQL} {where} ORDER BY id", params).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """All records in insertion order"""
+        try:
+            return self._query()
+
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+            return []
+
+    def find_by_user(self, user_id: Any) -> List[Dict[str, Any]]:
+        """Records for one user, via idx_consultations_user_id"""
+        return self._query("WHERE user_id = ?", (user_id,))
+
+    def find_by_date(self, date: str) -> List[Dict[str, Any]]:
+        """Records saved on a given YYYY-MM-DD day, via a range scan on idx_consultations_date"""
+        return self._query("WHERE date >= ? AND date < ?", (date, date + "\uffff"))
+
+    def find_by_language(self, language: str) -> List[Dict[str, Any]]:
+        """Records in a given language, via idx_consultations_language"""
+        return self._query("WHERE language = ?", (language,))
+
+    def statistics(self) -> Dict[str, Any]:
+        """Aggregate counters from the consultation_counts table"""
+        counts = {"total": {}, "language": {}, "gender": {}}
+        for kind, key, count in self.connection.execute("SELECT kind, key, count FROM consultation_counts"):
+            counts.setdefault(kind, {})[key] = count
+        unique_users = self.connection.execute("SELECT COUNT(*) FROM consultation_users").fetchone()[0]
+
+        return {
+            "total_consultations": counts["total"].get("", 0),
+            "unique_users": unique_users,
+            "language_distribution": counts["language"],
+            "gender_distribution": counts["gender"]
+        }
+
+    def file_size(self) -> int:
+        """Size of the database plus its write-ahead log in bytes"""
+        return sum(os.path.getsize(path) for path in (self.data_file, self.data_file + "-wal")
+                   if os.path.exists(path))
+
+    def close(self):
+        """Checkpoint the WAL and close the connection"""
+        try:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
+        self.connection.close()
+
+def iter_jsonl_with_offsets(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (byte offset, record) pairs from a JSON Lines file, skipping torn or corrupt lines"""
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'rb') as f:
+        offset = 0
+        for line_number, line in enumerate(f, 1):
+            line_offset = offset
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                logger.warning(f"Skipping corrupt record at {path}:{line_number}")
+                continue
+            if isinstance(record, dict):
+                yield line_offset, record
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from a JSON Lines file, skipping torn or corrupt lines"""
+    for _, record in iter_jsonl_with_offsets(path):
+        yield record
+
+def _read_any(source_file: str) -> Iterator[Dict[str, Any]]:
+    """Read records from either a JSON array file or a JSON Lines file"""
+    with open(source_file, 'r', encoding='utf-8') as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+
+    if head == '[':
+        yield from JsonArrayStorage(source_file).load_all()
+    else:
+        yield from iter_jsonl(source_file)
+
+def compact_to_jsonl(source_file: str, target_file: Optional[str] = None) -> int:
+    """
+    Rewrite records into a clean JSON Lines file.
+
+    Converts a legacy ``users.json`` array (migration) or rewrites an existing
+    ``.jsonl`` file without torn/corrupt lines (compaction). The output is
+    written to a temporary file, fsynced and atomically renamed into place, so
+    this is safe to run against a file that is not being written to.
+
+    Args:
+        source_file (str): JSON array or JSON Lines file to read
+        target_file (str): Output path; defaults to rewriting source_file in place
+
+    Returns:
+        int: Number of records written
+    """
+    target_file = target_file or source_file
+    temp_file = f"{target_file}.tmp"
+    count = 0
+
+    with open(temp_file, 'w', encoding='utf-8') as out:
+        for record in _read_any(source_file):
+            out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+            count += 1
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(temp_file, target_file)
+    logger.info(f"Wrote {count} records from {source_file} to {target_file}")
+    return count
+
+def import_to_sqlite(source_file: str, target_file: str) -> int:
+    """
+    One-shot import of a JSON array or JSON Lines file into a SQLite database.
+
+    Args:
+        source_file (str): users.json or users.jsonl file to read
+        target_file (str): SQLite database to create or append to
+
+    Returns:
+        int: Number of records imported
+    """
+    storage = SqliteStorage(target_file)
+    try:
+        count = storage.append_many(_read_any(source_file))
+    finally:
+        storage.close()
+
+    logger.info(f"Imported {count} records from {source_file} into {target_file}")
+    return count
@@ -0,0 +1,176 @@
+"""
+Pluggable speech-to-text engines: Google Web Speech (network) and Vosk (local, CPU only).
+"""
+
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+import speech_recognition as sr
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class STTEngine(ABC):
+    """Speech recognition backend used by VoiceProcessor.
+
+    Engines are called from the speech worker pool, so implementations may
+    block but must be safe to call from several threads at once.
+    """
+
+    name = "engine"
+
+    @abstractmethod
+    def transcribe(self, audio: sr.AudioData, language: str) -> str:
+        """
+        Recognize one clip.
+
+        Args:
+            audio (sr.AudioData): Recorded clip
+            language (str): Language code such as "hi-IN"
+
+        Returns:
+            str: Transcribed text
+
+        Raises:
+            ValueError: If the audio could not be understood or the service failed
+        """
+
+    def timed_transcribe(self, audio: sr.AudioData, language: str) -> str:
+        """transcribe() with its duration recorded per engine and language"""
+        started = time.perf_counter()
+        try:
+            return self.transcribe(audio, language)
+        finally:
+            metrics.observe("stt_duration_seconds", time.perf_counter() - started,
+                            engine=self.name, language=language)
+
+class GoogleSTTEngine(STTEngine):
+    name = "google"
+
+    def __init__(self, recognizer: Optional[sr.Recognizer] = None, endpoint: Optional[str] = None):
+        """
+        Initialize the Google Web Speech engine.
+
+        Args:
+            recognizer (sr.Recognizer): Recognizer to call recognize_google on
+            endpoint (str): Alternative API endpoint (benchmarks use a local fake)
+        """
+        self.recognizer = recognizer or sr.Recognizer()
+        self.endpoint = endpoint
+
+    def transcribe(self, audio: sr.AudioData, language: str) -> str:
+        try:
+            # Use Google Speech Recognition
+            endpoint = {"endpoint": self.endpoint} if self.endpoint else {}
+            return self.recognizer.recognize_google(audio, language=language, **endpoint)
+
+        except sr.UnknownValueError:
+            logger.warning("Could not understand audio")
+            raise ValueError("Could not understand audio")
+
+        except sr.RequestError as e:
+            logger.error(f"Speech recognition service error: {e}")
+            raise ValueError(f"Speech recognition service error: {e}")
+
+class VoskSTTEngine(STTEngine):
+    name = "vosk"
+
+    def __init__(self, model_paths: Dict[str, str], sample_rate: int = 16000):
+        """
+        Initialize the offline Vosk engine and load every model up front.
+
+        Models stay in memory for the life of the process and are shared by
+        all threads; a lightweight recognizer is created per clip.
+
+        Args:
+            model_paths (Dict[str, str]): Language code -> unpacked Vosk model directory
+            sample_rate (int): Rate clips are converted to before recognition
+        """
+        try:
+            import vosk
+        except ImportError as e:
+            raise ImportError("VoskSTTEngine requires the 'vosk' package") from e
+
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.sample_rate = sample_rate
+        self.models = {}
+        for language, path in model_paths.items():
+            started = time.perf_counter()
+            self.models[language] = vosk.Model(path)
+            logger.info(f"Loaded Vosk model for {language} from {path} in {time.perf_counter() - started:.1f}s")
+        self._warm_up()
+
+    def _warm_up(self):
+        """Decode a short silence with each model so the first user does not pay for page faults"""
+        silence = bytes(self.sample_rate // 2 * 2)
+        for model in self.models.values():
+            recognizer = self._vosk.KaldiRecognizer(model, self.sample_rate)
+            recognizer.AcceptWaveform(silence)
+            recognizer.FinalResult()
+
+    def transcribe(self, audio: sr.AudioData, language: str) -> str:
+        model = self.models.get(language)
+        if model is None:
+            raise ValueError(f"No Vosk model loaded for {language}")
+
+        recognizer = self._vosk.KaldiRecognizer(model, self.sample_rate)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        if not text:
+            logger.warning("Could not understand audio")
+            raise ValueError("Could not understand audio")
+        return text
+
+def parse_language_map(value: str) -> Dict[str, str]:
+    """Parse "en-US:google,hi-IN:/models/hi" into a dict (values may contain colons)"""
+    mapping = {}
+    for entry in value.split(","):
+        if entry.strip():
+            language, _, setting = entry.strip().partition(":")
+            mapping[language.strip()] = setting.strip()
+    return mapping
+
+def create_stt_engines(default_engine: str, language_engines: Dict[str, str],
+                       recognizer: Optional[sr.Recognizer] = None, google_endpoint: Optional[str] = None,
+                       vosk_models: Optional[Dict[str, str]] = None) -> Tuple[STTEngine, Dict[str, STTEngine]]:
+    """
+    Build the engines needed for a per-language selection.
+
+    Args:
+        default_engine (str): "google" or "vosk", used for languages without an override
+        language_engines (Dict[str, str]): Language code -> engine name overrides
+        recognizer (sr.Recognizer): Recognizer for the Google engine
+        google_endpoint (str): Alternative Google API endpoint
+        vosk_models (Dict[str, str]): Language code -> Vosk model directory
+
+    Returns:
+        Tuple[STTEngine, Dict[str, STTEngine]]: Default engine and engine per overridden language
+
+    Raises:
+        ValueError: For unknown engine names or Vosk languages without a model
+    """
+    engines: Dict[str, STTEngine] = {}
+    vosk_models = vosk_models or {}
+
+    def build(name: str) -> STTEngine:
+        name = name.lower()
+        if name not in engines:
+            if name == "google":
+                engines[name] = GoogleSTTEngine(recognizer, google_endpoint)
+            elif name == "vosk":
+                engines[name] = VoskSTTEngine(vosk_models)
+            else:
+                raise ValueError(f"Unknown STT engine: {name}")
+        return engines[name]
+
+    for language, name in language_engines.items():
+        if name.lower() == "vosk" and language not in vosk_models:
+            raise ValueError(f"STT engine vosk selected for {language} but no model is configured in VOSK_MODELS")
+
+    default = build(default_engine)
+    return default, {language: build(name) for language, name in language_engines.items()}
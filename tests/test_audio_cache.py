@@ -0,0 +1,30 @@
+"""
+AudioCache file and file_id persistence.
+"""
+
+import asyncio
+import json
+import os
+
+from audio_cache import AudioCache
+
+def test_async_put_and_file_id_survive_reopen(tmp_path):
+    cache_dir = str(tmp_path)
+    key = AudioCache.make_key("advice", "en")
+
+    async def fill():
+        cache = AudioCache(cache_dir)
+        assert await cache.get_async(key) is None
+        await cache.put_async(key, b"audio")
+        await cache.set_file_id_async(key, "file-1")
+        return cache
+
+    cache = asyncio.run(fill())
+    assert cache.stats()["misses"] == 1
+    assert not os.path.exists(os.path.join(cache_dir, "file_ids.json.tmp"))
+    with open(os.path.join(cache_dir, "file_ids.json"), encoding="utf-8") as f:
+        assert json.load(f) == {key: "file-1"}
+
+    reopened = AudioCache(cache_dir)
+    assert asyncio.run(reopened.get_async(key)) == b"audio"
+    assert reopened.get_file_id(key) == "file-1"
@@ -0,0 +1,53 @@
+"""
+KeyValuePersistence with the SQLite store.
+"""
+
+import asyncio
+import threading
+import time
+
+from persistence import KeyValuePersistence, SqliteKeyValueStore
+
+async def _save(persistence: KeyValuePersistence, data: dict):
+    await persistence.update_user_data(42, data)
+    await persistence.flush()
+
+def test_symptoms_and_advice_are_not_persisted(tmp_path):
+    path = str(tmp_path / "state.db")
+    asyncio.run(_save(KeyValuePersistence(SqliteKeyValueStore(path), flush_delay=0),
+                      {"name": "Asha", "symptoms": "fever", "advice": "rest"}))
+    stored = asyncio.run(KeyValuePersistence(SqliteKeyValueStore(path)).get_user_data())
+    assert stored == {42: {"name": "Asha"}}
+
+def test_cleared_user_data_removes_the_row(tmp_path):
+    path = str(tmp_path / "state.db")
+    asyncio.run(_save(KeyValuePersistence(SqliteKeyValueStore(path), flush_delay=0), {"name": "Asha"}))
+    asyncio.run(_save(KeyValuePersistence(SqliteKeyValueStore(path), flush_delay=0), {}))
+    assert asyncio.run(KeyValuePersistence(SqliteKeyValueStore(path)).get_user_data()) == {}
+
+def test_abandoned_conversations_expire(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    asyncio.run(_save(KeyValuePersistence(SqliteKeyValueStore(path, ttl=60), flush_delay=0), {"name": "Asha"}))
+    assert asyncio.run(KeyValuePersistence(SqliteKeyValueStore(path, ttl=60)).get_user_data()) == {42: {"name": "Asha"}}
+
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert asyncio.run(KeyValuePersistence(SqliteKeyValueStore(path, ttl=60)).get_user_data()) == {}
+
+def test_coalesced_writes_run_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        persistence = KeyValuePersistence(SqliteKeyValueStore(path), flush_delay=0.01)
+        calls = []
+        write_batch = persistence.store.write_batch
+        persistence.store.write_batch = lambda *args: (calls.append(threading.current_thread()),
+                                                      write_batch(*args))
+        await persistence.update_user_data(42, {"name": "Asha"})
+        await asyncio.sleep(0.2)
+        await persistence.flush()
+        return calls
+
+    calls = asyncio.run(scenario())
+    assert calls and threading.main_thread() not in calls
+    assert asyncio.run(KeyValuePersistence(SqliteKeyValueStore(path)).get_user_data()) == {42: {"name": "Asha"}}
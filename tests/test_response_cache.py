@@ -0,0 +1,42 @@
+"""
+ResponseCache memory and SQLite tiers.
+"""
+
+import asyncio
+import sqlite3
+import time
+
+from response_cache import ResponseCache
+
+def _disk_rows(path: str) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+def test_async_lookup_reads_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = ResponseCache(persist_path=path)
+    asyncio.run(writer.set_async("key", "advice"))
+    writer.close()
+
+    reader = ResponseCache(persist_path=path)
+    assert asyncio.run(reader.get_async("key")) == "advice"
+    assert reader.stats()["disk_hits"] == 1
+    reader.close()
+
+def test_expired_entries_are_purged_on_open_and_every_n_writes(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(ttl=10, persist_path=path, purge_every=3)
+    cache.set("old-1", "a")
+    cache.set("old-2", "b")
+    assert _disk_rows(path) == 2
+
+    later = time.time() + 60
+    monkeypatch.setattr(time, "time", lambda: later)
+    cache.set("new", "c")  # third write purges the two expired entries
+    assert _disk_rows(path) == 1
+    cache.set("new-2", "d")
+    cache.close()
+
+    monkeypatch.setattr(time, "time", lambda: later + 60)
+    ResponseCache(persist_path=path).close()
+    assert _disk_rows(path) == 0
@@ -0,0 +1,47 @@
+"""
+Storage backends: JSON Lines fsync policy and JSON array record isolation.
+"""
+
+import os
+import time
+
+import storage
+from storage import JsonLinesStorage
+
+def test_batch_policy_fsyncs_after_interval_without_further_appends(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(storage.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+
+    store = JsonLinesStorage(str(tmp_path / "users.jsonl"), fsync_batch_size=32, fsync_interval=0.05)
+    store.append({"user_id": 1})
+    assert not synced
+
+    deadline = time.monotonic() + 2
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(synced) == 1
+    store.close()
+    assert len(synced) == 1
+
+def test_close_fsyncs_pending_records(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(storage.os, "fsync", synced.append)
+
+    store = JsonLinesStorage(str(tmp_path / "users.jsonl"), fsync_batch_size=32, fsync_interval=60)
+    store.append({"user_id": 1})
+    store.close()
+    assert len(synced) == 1
+    assert store.load_all() == [{"user_id": 1}]
+
+def test_json_array_results_are_copies(tmp_path):
+    from storage import JsonArrayStorage
+    store = JsonArrayStorage(str(tmp_path / "users.json"))
+    record = {"user_id": 1, "date": "2024-01-02T10:00:00", "language": "English", "name": "Asha"}
+    store.append(record)
+    record["name"] = "changed by caller"
+
+    for results in (store.load_all(), store.find_by_user(1), store.find_by_date("2024-01-02"),
+                    store.find_by_language("English")):
+        results[0]["name"] = "changed by reader"
+    assert store.load_all() == [{"user_id": 1, "date": "2024-01-02T10:00:00", "language": "English", "name": "Asha"}]
@@ -0,0 +1,79 @@
+"""
+WebhookServer request validation.
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from telegram.ext import Application, MessageHandler, filters
+
+from benchmarks.fakes import FakeTelegramServer
+from update_processor import PerUserUpdateProcessor
+from webhook_server import WebhookServer
+
+async def _post(body: bytes) -> int:
+    application = Application.builder().token("123456:FAKE").build()
+    server = WebhookServer(application, url_path="/telegram")
+    runner = web.AppRunner(server.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"http://127.0.0.1:{port}/telegram", data=body,
+                                    headers={"Content-Type": "application/json"}) as response:
+                return response.status
+    finally:
+        await runner.cleanup()
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b"null", b"42", b'"update"', b"\xff\xfe{}"])
+def test_malformed_bodies_are_rejected_with_400(body):
+    assert asyncio.run(_post(body)) == 400
+
+def test_update_is_accepted():
+    assert asyncio.run(_post(b'{"update_id": 1}')) == 200
+
+def test_backlog_beyond_limit_is_rejected_with_503():
+    limit, concurrency, posts = 5, 2, 20
+
+    async def slow_handler(update, context):
+        await asyncio.sleep(0.5)
+
+    async def scenario(telegram_url: str):
+        application = (Application.builder().token("123456:FAKE")
+                       .base_url(f"{telegram_url}/bot")
+                       .update_queue(asyncio.Queue(maxsize=limit))
+                       .concurrent_updates(PerUserUpdateProcessor(concurrency)).build())
+        application.add_handler(MessageHandler(filters.ALL, slow_handler))
+        await application.initialize()
+        await application.start()
+        server = WebhookServer(application, url_path="/telegram")
+        runner = web.AppRunner(server.build_app())
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        statuses = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                for update_id in range(posts):
+                    body = {"update_id": update_id, "message": {
+                        "message_id": update_id, "date": 0, "text": "hi",
+                        "chat": {"id": update_id, "type": "private"},
+                        "from": {"id": update_id, "is_bot": False, "first_name": "U"}}}
+                    async with session.post(f"http://127.0.0.1:{port}/telegram", json=body) as response:
+                        statuses.append(response.status)
+                    await asyncio.sleep(0)
+        finally:
+            await runner.cleanup()
+            await application.stop()
+            await application.shutdown()
+        return statuses
+
+    with FakeTelegramServer() as telegram:
+        statuses = asyncio.run(scenario(telegram.url))
+    assert statuses.count(200) == limit + concurrency
+    assert statuses.count(503) == posts - limit - concurrency
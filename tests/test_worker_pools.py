@@ -0,0 +1,46 @@
+"""
+BoundedExecutor job accounting.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from worker_pools import BoundedExecutor, WorkerPoolBusyError
+
+def test_cancelled_caller_keeps_slot_until_job_finishes():
+    release = threading.Event()
+    started = threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+
+    async def scenario(pool):
+        task = asyncio.create_task(pool.run(job))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The job is still running in the pool, so it still counts against the bound
+        assert pool.pending == 1
+        with pytest.raises(WorkerPoolBusyError):
+            await pool.run(job)
+
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.pending == 0
+        assert await pool.run(lambda: "done") == "done"
+
+    pool = BoundedExecutor("test", ThreadPoolExecutor(max_workers=2), max_pending=1)
+    try:
+        asyncio.run(scenario(pool))
+    finally:
+        release.set()
+        pool.shutdown()
@@ -0,0 +1,334 @@
+"""
+Pluggable text-to-speech engines: gTTS (network) and Piper (local, CPU only).
+"""
+
+import io
+import logging
+import re
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from gtts import gTTS
+from pydub import AudioSegment
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Opus settings for speech: mono with VoIP tuning; 24 kbit/s wideband is clear for a single voice
+OPUS_BITRATE = "24k"
+
+# Sentence chunking: gTTS sends one request per 100 characters, so chunks of that size
+# map to one request each. Sentences end at . ! ? or the Devanagari danda (। ॥);
+# longer sentences are split at clause punctuation, then at spaces.
+TTS_CHUNK_CHARS = 100
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[।॥])\s*|\n+")
+CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+def _split_long(text: str, max_chars: int, separators: List[re.Pattern]) -> List[str]:
+    """Split text longer than max_chars at the first separator that applies, else at spaces"""
+    if len(text) <= max_chars:
+        return [text]
+    if separators:
+        pieces = [piece for piece in separators[0].split(text) if piece.strip()]
+    else:
+        pieces = text.split()
+        if len(pieces) == 1:
+            return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    chunks = []
+    for piece in pieces:
+        chunks.extend(_split_long(piece, max_chars, separators[1:]))
+    return _merge(chunks, max_chars)
+
+def _merge(pieces: List[str], max_chars: int) -> List[str]:
+    """Join consecutive pieces with spaces while they fit in max_chars"""
+    chunks: List[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+def split_sentences(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into chunks of whole sentences of at most max_chars characters.
+
+    Sentence ends are . ! ? followed by whitespace (so "2.5" stays intact) and
+    the Devanagari danda and double danda used in Hindi and Marathi. Short
+    sentences are grouped up to max_chars; a longer sentence is split at
+    commas, semicolons or colons, then between words.
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Maximum chunk length
+
+    Returns:
+        List[str]: Chunks in reading order
+    """
+    sentences = [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+    pieces: List[str] = []
+    for sentence in sentences:
+        pieces.extend(_split_long(sentence, max_chars, [CLAUSE_END]))
+    return _merge(pieces, max_chars)
+
+def encode_opus_stream(write_input: Callable[[BinaryIO], None], input_args: List[str],
+                       bitrate: str = OPUS_BITRATE) -> bytes:
+    """
+    Encode audio to an OGG/Opus voice note with ffmpeg while it is being produced.
+
+    write_input gets ffmpeg's stdin and may write in pieces as audio becomes
+    available (gTTS writes one MP3 part per sentence request, Piper one PCM
+    chunk per sentence), so synthesis and encoding overlap. Encoded output is
+    drained concurrently, so neither side blocks on a full pipe, and nothing
+    touches the disk.
+
+    Args:
+        write_input (Callable): Writes the source audio to the given pipe
+        input_args (List[str]): ffmpeg options describing the input, e.g. ["-f", "mp3"]
+        bitrate (str): Opus bitrate, e.g. "24k"
+
+    Returns:
+        bytes: OGG/Opus data
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    command = [
+        AudioSegment.converter, "-hide_banner", "-loglevel", "error", *input_args, "-i", "pipe:0",
+        "-ac", "1", "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output: List[bytes] = []
+    reader = threading.Thread(target=lambda: output.append(process.stdout.read()), daemon=True)
+    reader.start()
+
+    try:
+        with process.stdin:
+            write_input(process.stdin)
+    except BrokenPipeError:
+        # ffmpeg exited early; its exit status and error are reported below
+        pass
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        reader.join()
+        errors = process.stderr.read()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg could not encode Opus: {errors.decode(errors='replace').strip()}")
+    return output[0]
+
+class TTSEngine(ABC):
+    """Speech synthesis backend used by VoiceProcessor.
+
+    Engines are called from the speech worker pool, so implementations may
+    block but must be safe to call from several threads at once.
+
+    synthesize() splits text into sentence chunks, synthesizes them on
+    chunk_executor (serially without one) and joins the parts in order;
+    engines implement the per-chunk synthesis and the join.
+    """
+
+    name = "engine"
+    # Container of the bytes synthesize() returns: "mp3" or "ogg" (Opus)
+    audio_format = "ogg"
+    bitrate = OPUS_BITRATE
+    chunk_chars = TTS_CHUNK_CHARS
+    chunk_executor: Optional[Executor] = None
+
+    @property
+    def variant(self) -> str:
+        """Engine, format and bitrate; audio from different variants is not interchangeable"""
+        return f"{self.name}:{self.audio_format}:{self.bitrate}" if self.audio_format == "ogg" else \
+            f"{self.name}:{self.audio_format}"
+
+    @abstractmethod
+    def synthesize_part(self, text: str, language: str) -> bytes:
+        """
+        Speak one chunk of text.
+
+        Args:
+            text (str): Chunk to speak
+            language (str): Voice language code such as "hi"
+
+        Returns:
+            bytes: Audio in the engine's intermediate format, which join_parts() accepts
+        """
+
+    @abstractmethod
+    def join_parts(self, parts: Iterable[bytes], language: str) -> bytes:
+        """
+        Combine chunk audio, in order, into one reply in audio_format.
+
+        parts is consumed lazily and yields each chunk as soon as it and all
+        chunks before it are synthesized, so encoding can start early.
+        """
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        """
+        Speak text in a voice language.
+
+        Args:
+            text (str): Text to speak
+            language (str): Voice language code such as "hi"
+
+        Returns:
+            bytes: Encoded audio in audio_format
+        """
+        chunks = split_sentences(text, self.chunk_chars) or [text]
+        metrics.increment("tts_chunks_total", len(chunks), engine=self.name, language=language)
+        if self.chunk_executor is None or len(chunks) == 1:
+            return self.join_parts((self.synthesize_part(chunk, language) for chunk in chunks), language)
+
+        futures = [self.chunk_executor.submit(self.synthesize_part, chunk, language) for chunk in chunks]
+        try:
+            return self.join_parts((future.result() for future in futures), language)
+        finally:
+            # After a failure, drop chunks that have not started yet
+            for future in futures:
+                future.cancel()
+
+    def timed_synthesize(self, text: str, language: str) -> bytes:
+        """synthesize() with its duration and character count recorded per engine and language"""
+        started = time.perf_counter()
+        audio_data = self.synthesize(text, language)
+        metrics.observe("tts_duration_seconds", time.perf_counter() - started, engine=self.name, language=language)
+        metrics.increment("tts_characters_total", len(text), engine=self.name, language=language)
+        return audio_data
+
+class GTTSEngine(TTSEngine):
+    name = "gtts"
+
+    def __init__(self, audio_format: str = "ogg", bitrate: str = OPUS_BITRATE):
+        """
+        Initialize the gTTS engine.
+
+        Args:
+            audio_format (str): "ogg" to transcode gTTS's MP3 to OGG/Opus as it
+                arrives, or "mp3" to pass it through unchanged
+            bitrate (str): Opus bitrate of the output
+        """
+        if audio_format not in ("ogg", "mp3"):
+            raise ValueError(f"Unknown TTS audio format: {audio_format}")
+        self.audio_format = audio_format
+        self.bitrate = bitrate
+
+    def synthesize_part(self, text: str, language: str) -> bytes:
+        audio_buffer = io.BytesIO()
+        gTTS(text=text, lang=language, slow=False).write_to_fp(audio_buffer)
+        return audio_buffer.getvalue()
+
+    def join_parts(self, parts: Iterable[bytes], language: str) -> bytes:
+        # MP3 frames are self-contained, so concatenated parts are one stream (as gTTS itself does)
+        if self.audio_format == "mp3":
+            return b"".join(parts)
+
+        def write_parts(pipe: BinaryIO):
+            for part in parts:
+                pipe.write(part)
+
+        return encode_opus_stream(write_parts, ["-f", "mp3"], self.bitrate)
+
+class PiperTTSEngine(TTSEngine):
+    name = "piper"
+
+    def __init__(self, voice_paths: Dict[str, str], bitrate: str = OPUS_BITRATE):
+        """
+        Initialize the offline Piper engine and load every voice up front.
+
+        Voices stay in memory for the life of the process and are shared by
+        all threads. Synthesized PCM is encoded straight to OGG/Opus.
+
+        Args:
+            voice_paths (Dict[str, str]): Voice language code -> Piper .onnx voice model
+                (its .onnx.json config next to it)
+            bitrate (str): Opus bitrate of the output
+        """
+        try:
+            from piper import PiperVoice
+        except ImportError as e:
+            raise ImportError("PiperTTSEngine requires the 'piper-tts' package") from e
+
+        self.bitrate = bitrate
+        self.voices = {}
+        for language, path in voice_paths.items():
+            started = time.perf_counter()
+            self.voices[language] = PiperVoice.load(path)
+            logger.info(f"Loaded Piper voice for {language} from {path} in {time.perf_counter() - started:.1f}s")
+
+        # The first inference initializes the ONNX session; do it now rather than for the first user
+        for voice in self.voices.values():
+            for _ in voice.synthesize("."):
+                pass
+
+    def _voice(self, language: str):
+        voice = self.voices.get(language)
+        if voice is None:
+            raise ValueError(f"No Piper voice loaded for {language}")
+        return voice
+
+    def synthesize_part(self, text: str, language: str) -> bytes:
+        return b"".join(chunk.audio_int16_bytes for chunk in self._voice(language).synthesize(text))
+
+    def join_parts(self, parts: Iterable[bytes], language: str) -> bytes:
+        def write_pcm(pipe: BinaryIO):
+            # Each chunk is encoded while the following ones are synthesized
+            for part in parts:
+                pipe.write(part)
+
+        input_args = ["-f", "s16le", "-ar", str(self._voice(language).config.sample_rate), "-ac", "1"]
+        return encode_opus_stream(write_pcm, input_args, self.bitrate)
+
+def create_tts_engines(default_engine: str, language_engines: Dict[str, str],
+                       piper_voices: Optional[Dict[str, str]] = None, audio_format: str = "ogg",
+                       bitrate: str = OPUS_BITRATE, chunk_chars: int = TTS_CHUNK_CHARS,
+                       chunk_executor: Optional[Executor] = None) -> Tuple[TTSEngine, Dict[str, TTSEngine]]:
+    """
+    Build the engines needed for a per-language selection.
+
+    Args:
+        default_engine (str): "gtts" or "piper", used for languages without an override
+        language_engines (Dict[str, str]): Voice language code -> engine name overrides
+        piper_voices (Dict[str, str]): Voice language code -> Piper voice model
+        audio_format (str): gTTS output, "ogg" (Opus) or "mp3"; Piper always produces OGG/Opus
+        bitrate (str): Opus bitrate
+        chunk_chars (int): Maximum characters per synthesized sentence chunk
+        chunk_executor (Executor): Pool synthesizing chunks in parallel, shared by
+            all engines so it bounds concurrent synthesis; None synthesizes serially
+
+    Returns:
+        Tuple[TTSEngine, Dict[str, TTSEngine]]: Default engine and engine per overridden language
+
+    Raises:
+        ValueError: For unknown engine names or Piper languages without a voice
+    """
+    engines: Dict[str, TTSEngine] = {}
+    piper_voices = piper_voices or {}
+
+    def build(name: str) -> TTSEngine:
+        name = name.lower()
+        if name not in engines:
+            if name == "gtts":
+                engines[name] = GTTSEngine(audio_format, bitrate)
+            elif name == "piper":
+                engines[name] = PiperTTSEngine(piper_voices, bitrate)
+            else:
+                raise ValueError(f"Unknown TTS engine: {name}")
+            engines[name].chunk_chars = chunk_chars
+            engines[name].chunk_executor = chunk_executor
+        return engines[name]
+
+    for language, name in language_engines.items():
+        if name.lower() == "piper" and language not in piper_voices:
+            raise ValueError(f"TTS engine piper selected for {language} but no voice is configured in PIPER_VOICES")
+
+    default = build(default_engine)
+    return default, {language: build(name) for language, name in language_engines.items()}
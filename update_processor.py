@@ -0,0 +1,89 @@
+"""
+Concurrent update processing that keeps each conversation's updates in order.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# PTB's own semaphore is sized so it never limits; the real cap is applied inside
+# do_process_update, after the per-conversation lock, so an update queued behind
+# its own user's earlier update does not occupy a worker slot while it waits.
+# Application therefore takes every update off update_queue at once; backpressure
+# comes from pending_updates, which counts updates admitted but not yet finished.
+_UNLIMITED = 1_000_000
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Process updates from different users concurrently, one at a time per user.
+
+        Updates are keyed by (chat_id, user_id), matching the per_chat/per_user
+        keys of the ConversationHandler, so its state machine never sees a
+        user's messages out of order.
+
+        Args:
+            max_concurrent_updates (int): Maximum updates processed at the same time
+        """
+        super().__init__(_UNLIMITED)
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates must be a positive integer")
+        self.concurrency_limit = max_concurrent_updates
+        self._workers = asyncio.Semaphore(max_concurrent_updates)
+        self._locks: Dict[Optional[Tuple[Any, Any]], asyncio.Lock] = {}
+        self._waiters: Dict[Optional[Tuple[Any, Any]], int] = {}
+        self.pending_updates = 0
+
+    @staticmethod
+    def _conversation_key(update: object) -> Optional[Tuple[Any, Any]]:
+        """Key identifying the conversation an update belongs to"""
+        if not isinstance(update, Update):
+            return None
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        user_id = update.effective_user.id if update.effective_user else None
+        if chat_id is None and user_id is None:
+            return None
+        return chat_id, user_id
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Wait for earlier updates of the same conversation, then for a free worker slot"""
+        self.pending_updates += 1
+        try:
+            await self._process_in_order(update, coroutine)
+        finally:
+            self.pending_updates -= 1
+
+    async def _process_in_order(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._conversation_key(update)
+        if key is None:
+            async with self._workers:
+                await coroutine
+            return
+
+        # No await happens before lock acquisition, so tasks queue on the lock in
+        # the order Application created them, i.e. the order updates arrived
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+
+        try:
+            async with lock:
+                async with self._workers:
+                    await coroutine
+        finally:
+            self._waiters[key] -= 1
+            if self._waiters[key] == 0:
+                del self._waiters[key]
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        """Nothing to set up"""
+
+    async def shutdown(self) -> None:
+        """Nothing to release"""
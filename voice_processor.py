@@ -2,56 +2,317 @@
 Voice processing module for speech-to-text and text-to-speech functionality.
 """
 
+import asyncio
+import io
 import logging
 import os
 import tempfile
-import asyncio
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple, Union
 import speech_recognition as sr
-from gtts import gTTS
 from pydub import AudioSegment
 
+import metrics
+from audio_cache import AudioCache
+from stt_engines import STTEngine, create_stt_engines, parse_language_map
+from tts_engines import TTSEngine, create_tts_engines
+from worker_pools import WorkerPoolBusyError, create_process_pool, create_thread_pool
+
 logger = logging.getLogger(__name__)
 
+# Speech recognition input: Google STT gains nothing from more than 16 kHz mono 16-bit
+STT_SAMPLE_RATE = 16000
+
+# Energy-based voice activity detection on 30 ms frames. A frame is voiced when it is
+# louder than VAD_SILENCE_DBFS and VAD_MARGIN_DB above the clip's noise floor (its 10th
+# percentile frame level), so steady hum or hiss never counts as speech.
+VAD_FRAME_MS = 30
+VAD_SILENCE_DBFS = -50.0
+VAD_MARGIN_DB = 8.0
+VAD_MIN_SPEECH_MS = 200
+VAD_PADDING_MS = 150
+
+# Streaming recognition splits long notes at pauses of at least this long
+STT_SEGMENT_PAUSE_MS = 300
+
+def _frame_levels(audio: AudioSegment) -> Tuple[List[float], float]:
+    """Level of each VAD frame in dBFS and the level a frame must exceed to count as voiced"""
+    levels = [audio[start:start + VAD_FRAME_MS].dBFS for start in range(0, len(audio), VAD_FRAME_MS)]
+    if not levels:
+        return [], 0.0
+    noise_floor = sorted(levels)[len(levels) // 10]
+    return levels, max(VAD_SILENCE_DBFS, noise_floor + VAD_MARGIN_DB)
+
+def find_speech(audio: AudioSegment) -> Optional[Tuple[int, int]]:
+    """
+    Locate the voiced part of a clip.
+    
+    Args:
+        audio (AudioSegment): Decoded clip
+        
+    Returns:
+        Optional[Tuple[int, int]]: Start and end in milliseconds, padded by
+            VAD_PADDING_MS, or None if the clip is empty, silent or steady noise
+    """
+    levels, threshold = _frame_levels(audio)
+    voiced = [index for index, level in enumerate(levels) if level > threshold]
+    if len(voiced) * VAD_FRAME_MS < VAD_MIN_SPEECH_MS:
+        return None
+    
+    start = max(0, voiced[0] * VAD_FRAME_MS - VAD_PADDING_MS)
+    end = min(len(audio), (voiced[-1] + 1) * VAD_FRAME_MS + VAD_PADDING_MS)
+    return start, end
+
+def split_speech(audio: AudioSegment, max_ms: int,
+                 min_pause_ms: int = STT_SEGMENT_PAUSE_MS) -> List[Tuple[int, int]]:
+    """
+    Split the voiced part of a clip into segments of at most max_ms at pauses.
+    
+    Speech separated by at least min_pause_ms of silence is packed into
+    segments in order; speech running longer than max_ms without such a
+    pause is cut at its quietest frame in the last third of the segment.
+    Segments are padded by up to VAD_PADDING_MS, never into a neighbour.
+    
+    Args:
+        audio (AudioSegment): Decoded clip
+        max_ms (int): Longest segment in milliseconds
+        min_pause_ms (int): Shortest silence to split at
+        
+    Returns:
+        List[Tuple[int, int]]: Start and end of each segment in milliseconds,
+            empty if the clip holds no speech
+    """
+    levels, threshold = _frame_levels(audio)
+    voiced = [level > threshold for level in levels]
+    min_speech = VAD_MIN_SPEECH_MS // VAD_FRAME_MS
+    if sum(voiced) < min_speech:
+        return []
+    
+    max_frames = max(1, max_ms // VAD_FRAME_MS)
+    min_pause = max(1, min_pause_ms // VAD_FRAME_MS)
+    
+    # Stretches of speech separated by pauses of at least min_pause frames
+    regions: List[List[int]] = []
+    for index, is_voiced in enumerate(voiced):
+        if not is_voiced:
+            continue
+        if regions and index - regions[-1][1] < min_pause:
+            regions[-1][1] = index + 1
+        else:
+            regions.append([index, index + 1])
+    
+    # Cut stretches longer than a segment, then pack them into segments
+    pieces: List[List[int]] = []
+    for start, end in regions:
+        while end - start > max_frames:
+            cut = min(range(start + max(1, max_frames * 2 // 3), start + max_frames), key=lambda i: levels[i])
+            pieces.append([start, cut])
+            start = cut
+        pieces.append([start, end])
+    
+    segments: List[List[int]] = []
+    for start, end in pieces:
+        if segments and end - segments[-1][0] <= max_frames:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+    
+    # Drop segments that are only a click or a breath
+    segments = [segment for segment in segments if sum(voiced[segment[0]:segment[1]]) >= min_speech]
+    
+    bounds = []
+    for index, (start, end) in enumerate(segments):
+        previous_end = segments[index - 1][1] if index > 0 else None
+        next_start = segments[index + 1][0] if index + 1 < len(segments) else None
+        pad_before = VAD_PADDING_MS if previous_end is None else \
+            min(VAD_PADDING_MS, (start - previous_end) * VAD_FRAME_MS // 2)
+        pad_after = VAD_PADDING_MS if next_start is None else \
+            min(VAD_PADDING_MS, (next_start - end) * VAD_FRAME_MS // 2)
+        bounds.append((max(0, start * VAD_FRAME_MS - pad_before), min(len(audio), end * VAD_FRAME_MS + pad_after)))
+    return bounds
+
+def prepare_speech_audio(audio: AudioSegment, trim_silence: bool = True) -> Optional[AudioSegment]:
+    """
+    Downmix and resample a clip for speech recognition and trim it to the voiced part.
+    
+    Args:
+        audio (AudioSegment): Decoded clip
+        trim_silence (bool): Run voice activity detection; without it only the format changes
+        
+    Returns:
+        Optional[AudioSegment]: 16 kHz mono 16-bit audio, or None if no speech was found
+    """
+    audio = audio.set_channels(1).set_frame_rate(STT_SAMPLE_RATE).set_sample_width(2)
+    if not trim_silence:
+        return audio
+    
+    speech = find_speech(audio)
+    if speech is None:
+        return None
+    start, end = speech
+    return audio[start:end]
+
+def convert_audio_file(input_path: str, output_path: str, trim_silence: bool = True) -> bool:
+    """
+    Convert audio file using pydub (module level so process pools can pickle it).
+    
+    Returns:
+        bool: False if the clip holds no speech (nothing is written then)
+    """
+    audio = prepare_speech_audio(AudioSegment.from_ogg(input_path), trim_silence)
+    if audio is None:
+        return False
+    audio.export(output_path, format="wav")
+    return True
+
+def convert_audio_bytes(ogg_data: bytes, trim_silence: bool = True) -> Optional[bytes]:
+    """
+    Convert OGG bytes to WAV bytes using pydub (module level so process pools can pickle it).
+    
+    Returns:
+        Optional[bytes]: WAV data, or None if the clip holds no speech
+    """
+    audio = AudioSegment.from_file(io.BytesIO(ogg_data), format="ogg")
+    audio = prepare_speech_audio(audio, trim_silence)
+    if audio is None:
+        return None
+    wav_buffer = io.BytesIO()
+    audio.export(wav_buffer, format="wav")
+    return wav_buffer.getvalue()
+
+def split_voice_message(ogg_source: Union[str, bytes], max_ms: int,
+                        min_pause_ms: int = STT_SEGMENT_PAUSE_MS) -> List[bytes]:
+    """
+    Decode an OGG voice message and split its speech into WAV segments
+    (module level so process pools can pickle it).
+    
+    Args:
+        ogg_source (Union[str, bytes]): Path to the OGG file or its contents
+        max_ms (int): Longest segment in milliseconds
+        min_pause_ms (int): Shortest silence to split at
+        
+    Returns:
+        List[bytes]: 16 kHz mono WAV data per segment, in order; empty if the clip holds no speech
+    """
+    source = io.BytesIO(ogg_source) if isinstance(ogg_source, bytes) else ogg_source
+    audio = prepare_speech_audio(AudioSegment.from_file(source, format="ogg"), trim_silence=False)
+    segments = []
+    for start, end in split_speech(audio, max_ms, min_pause_ms):
+        wav_buffer = io.BytesIO()
+        audio[start:end].export(wav_buffer, format="wav")
+        segments.append(wav_buffer.getvalue())
+    return segments
+
 class VoiceProcessor:
     def __init__(self):
-        """Initialize voice processor with speech recognition"""
+        """Initialize voice processor with speech recognition and worker pools"""
         self.recognizer = sr.Recognizer()
         
+        # CPU-bound ffmpeg/pydub transcoding runs in its own (process) pool, network-bound
+        # STT/TTS calls in a separate thread pool; both reject work once their queue is full
+        transcode_workers = int(os.environ.get("AUDIO_TRANSCODE_WORKERS") or min(4, os.cpu_count() or 1))
+        transcode_queue = int(os.environ.get("AUDIO_TRANSCODE_QUEUE") or 16)
+        if (os.environ.get("AUDIO_TRANSCODE_POOL") or "process").lower() == "thread":
+            self.transcode_pool = create_thread_pool("transcode", transcode_workers, transcode_queue)
+        else:
+            self.transcode_pool = create_process_pool("transcode", transcode_workers, transcode_queue)
+        
+        self.speech_pool = create_thread_pool(
+            "speech",
+            int(os.environ.get("AUDIO_SPEECH_WORKERS") or 8),
+            int(os.environ.get("AUDIO_SPEECH_QUEUE") or 32)
+        )
+        
+        # STT_ENDPOINT lets benchmarks point Google speech recognition at a local fake server
+        self.stt_endpoint = os.environ.get("STT_ENDPOINT") or None
+        
+        # Speech recognition engine per language; local models are loaded once, here
+        self.stt_engine, self.stt_language_engines = create_stt_engines(
+            os.environ.get("STT_ENGINE") or "google",
+            parse_language_map(os.environ.get("STT_LANGUAGE_ENGINES") or ""),
+            recognizer=self.recognizer,
+            google_endpoint=self.stt_endpoint,
+            vosk_models=parse_language_map(os.environ.get("VOSK_MODELS") or "")
+        )
+        
+        # Long replies are synthesized as sentence chunks in parallel; this pool bounds how
+        # many chunks (gTTS requests) run at once across all replies
+        tts_chunk_workers = int(os.environ.get("TTS_CHUNK_WORKERS") or 8)
+        self.tts_chunk_executor = ThreadPoolExecutor(
+            max_workers=tts_chunk_workers, thread_name_prefix="tts_chunk"
+        ) if tts_chunk_workers > 1 else None
+        
+        # Speech synthesis engine per voice language; local voices are loaded once, here.
+        # Replies are OGG/Opus voice notes (TTS_FORMAT=mp3 keeps gTTS's MP3 as is)
+        self.tts_engine, self.tts_language_engines = create_tts_engines(
+            os.environ.get("TTS_ENGINE") or "gtts",
+            parse_language_map(os.environ.get("TTS_LANGUAGE_ENGINES") or ""),
+            piper_voices=parse_language_map(os.environ.get("PIPER_VOICES") or ""),
+            audio_format=(os.environ.get("TTS_FORMAT") or "ogg").lower(),
+            bitrate=os.environ.get("TTS_OPUS_BITRATE") or "24k",
+            chunk_chars=int(os.environ.get("TTS_CHUNK_CHARS") or 100),
+            chunk_executor=self.tts_chunk_executor
+        )
+        
+        # Reuse synthesized audio (and its Telegram file_id) for repeated advice text
+        tts_cache_mb = float(os.environ.get("TTS_CACHE_MAX_MB") or 100)
+        self.audio_cache = AudioCache(
+            cache_dir=os.environ.get("TTS_CACHE_DIR") or "tts_cache",
+            max_bytes=int(tts_cache_mb * 1024 * 1024),
+            extension=self.tts_engine.audio_format
+        ) if tts_cache_mb > 0 else None
+        
+        # Trim silence and reject clips without speech before uploading them to STT
+        self.trim_silence = os.environ.get("STT_TRIM_SILENCE", "1").lower() not in ("0", "false", "no")
+        
+        # Split long voice notes at pauses and recognize the segments concurrently, reporting
+        # partial transcripts as they arrive; segmenting relies on the same speech detection
+        self.stream_stt = self.trim_silence and \
+            os.environ.get("STT_STREAMING", "1").lower() not in ("0", "false", "no")
+        self.stt_segment_ms = int(float(os.environ.get("STT_SEGMENT_SECONDS") or 15) * 1000)
+        self.stt_segment_concurrency = int(os.environ.get("STT_SEGMENT_CONCURRENCY") or 4)
+        
         # Configure speech recognition settings
         self.recognizer.energy_threshold = 300
         self.recognizer.dynamic_energy_threshold = True
         self.recognizer.pause_threshold = 0.8
         self.recognizer.phrase_threshold = 0.3
     
-    async def transcribe_voice(self, ogg_file_path: str, language: str = 'en') -> Optional[str]:
+    async def transcribe_voice(self, ogg_file_path: str, language: str = 'en',
+                               on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[str]:
         """
         Transcribe voice message from OGG file to text.
         
         Args:
             ogg_file_path (str): Path to the OGG voice file
             language (str): Language code for speech recognition
+            on_partial (Callable): Awaited with the transcript so far while a long
+                note is recognized in segments
             
         Returns:
             Optional[str]: Transcribed text or None if failed
+            
+        Raises:
+            WorkerPoolBusyError: If the audio worker pools are saturated
         """
+        if self.stream_stt:
+            return await self._transcribe_segments(ogg_file_path, language, on_partial)
+        
         try:
             # Convert OGG to WAV for better compatibility with speech_recognition
             wav_file_path = await self._convert_ogg_to_wav(ogg_file_path)
             
             if not wav_file_path:
-                logger.error("Failed to convert OGG to WAV")
                 return None
             
             try:
-                # Perform speech recognition in a thread to avoid blocking
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(
-                    None, 
-                    self._perform_speech_recognition,
-                    wav_file_path,
-                    language
-                )
+                # Perform speech recognition in the speech pool to avoid blocking
+                with metrics.time_stage("stt"):
+                    text = await self.speech_pool.run(
+                        self._perform_speech_recognition,
+                        wav_file_path,
+                        language
+                    )
                 
                 logger.info(f"Successfully transcribed voice message: {text[:50]}...")
                 return text
@@ -61,6 +322,137 @@ class VoiceProcessor:
                 if os.path.exists(wav_file_path):
                     os.unlink(wav_file_path)
         
+        except WorkerPoolBusyError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error transcribing voice: {e}")
+            return None
+    
+    async def transcribe_voice_bytes(self, ogg_data: bytes, language: str = 'en',
+                                     on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[str]:
+        """
+        Transcribe an in-memory OGG voice message without touching the disk.
+        
+        Args:
+            ogg_data (bytes): OGG/Opus voice message contents
+            language (str): Language code for speech recognition
+            on_partial (Callable): Awaited with the transcript so far while a long
+                note is recognized in segments
+            
+        Returns:
+            Optional[str]: Transcribed text or None if failed
+            
+        Raises:
+            WorkerPoolBusyError: If the audio worker pools are saturated
+        """
+        if self.stream_stt:
+            return await self._transcribe_segments(ogg_data, language, on_partial)
+        
+        try:
+            with metrics.time_stage("transcode"):
+                wav_data = await self.transcode_pool.run(convert_audio_bytes, ogg_data, self.trim_silence)
+            
+            if wav_data is None:
+                metrics.increment("voice_rejected_total")
+                logger.info("No speech in voice message, skipping recognition")
+                return None
+            
+            with metrics.time_stage("stt"):
+                text = await self.speech_pool.run(
+                    self._perform_speech_recognition,
+                    io.BytesIO(wav_data),
+                    language
+                )
+            
+            logger.info(f"Successfully transcribed voice message: {text[:50]}...")
+            return text
+        
+        except WorkerPoolBusyError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error transcribing voice: {e}")
+            return None
+    
+    async def _transcribe_segments(self, ogg_source: Union[str, bytes], language: str,
+                                   on_partial: Optional[Callable[[str], Awaitable[None]]]) -> Optional[str]:
+        """
+        Transcribe a voice message split at pauses, recognizing segments concurrently.
+        
+        Segments are recognized by up to stt_segment_concurrency speech pool
+        jobs at once, so a long note takes about as long as its slowest
+        segment. Whenever the leading segments are all recognized, their text
+        is passed to on_partial. Segments that cannot be understood are left out.
+        
+        Args:
+            ogg_source (Union[str, bytes]): Path to the OGG file or its contents
+            language (str): Language code for speech recognition
+            on_partial (Callable): Awaited with the transcript so far, or None
+            
+        Returns:
+            Optional[str]: Transcribed text or None if failed
+            
+        Raises:
+            WorkerPoolBusyError: If the audio worker pools are saturated
+        """
+        try:
+            with metrics.time_stage("transcode"):
+                segments = await self.transcode_pool.run(split_voice_message, ogg_source, self.stt_segment_ms)
+            
+            if not segments:
+                metrics.increment("voice_rejected_total")
+                logger.info("No speech in voice message, skipping recognition")
+                return None
+            
+            metrics.increment("stt_segments_total", len(segments))
+            texts: List[Optional[str]] = [None] * len(segments)
+            finished = [False] * len(segments)
+            semaphore = asyncio.Semaphore(self.stt_segment_concurrency)
+            
+            async def recognize(index: int) -> int:
+                async with semaphore:
+                    try:
+                        texts[index] = await self.speech_pool.run(
+                            self._perform_speech_recognition,
+                            io.BytesIO(segments[index]),
+                            language
+                        )
+                    except ValueError as e:
+                        logger.info(f"Segment {index + 1}/{len(segments)} not transcribed: {e}")
+                return index
+            
+            with metrics.time_stage("stt"):
+                tasks = [asyncio.create_task(recognize(index)) for index in range(len(segments))]
+                try:
+                    ready = 0
+                    for next_done in asyncio.as_completed(tasks):
+                        finished[await next_done] = True
+                        reported = ready
+                        while ready < len(segments) and finished[ready]:
+                            ready += 1
+                        partial = " ".join(text for text in texts[:ready] if text)
+                        if on_partial is not None and reported < ready < len(segments) and partial:
+                            try:
+                                await on_partial(partial)
+                            except Exception as e:
+                                # Progress display only; never lose the transcript over it
+                                logger.warning(f"Partial transcript callback failed: {e}")
+                finally:
+                    for task in tasks:
+                        task.cancel()
+            
+            text = " ".join(text for text in texts if text)
+            if not text:
+                logger.warning("No segment of the voice message could be transcribed")
+                return None
+            
+            logger.info(f"Successfully transcribed voice message in {len(segments)} segments: {text[:50]}...")
+            return text
+        
+        except WorkerPoolBusyError:
+            raise
+        
         except Exception as e:
             logger.error(f"Error transcribing voice: {e}")
             return None
@@ -72,47 +464,43 @@ class VoiceProcessor:
             with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
                 wav_file_path = temp_wav.name
             
-            # Convert using pydub in a thread
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                self._convert_audio_file,
-                ogg_file_path,
-                wav_file_path
-            )
+            # Convert using pydub in the transcode pool
+            with metrics.time_stage("transcode"):
+                has_speech = await self.transcode_pool.run(
+                    convert_audio_file,
+                    ogg_file_path,
+                    wav_file_path,
+                    self.trim_silence
+                )
+            
+            if not has_speech:
+                os.unlink(wav_file_path)
+                metrics.increment("voice_rejected_total")
+                logger.info("No speech in voice message, skipping recognition")
+                return None
             
             return wav_file_path
         
+        except WorkerPoolBusyError:
+            os.unlink(wav_file_path)
+            raise
+        
         except Exception as e:
             logger.error(f"Error converting OGG to WAV: {e}")
             return None
     
-    def _convert_audio_file(self, input_path: str, output_path: str):
-        """Convert audio file using pydub"""
-        audio = AudioSegment.from_ogg(input_path)
-        audio.export(output_path, format="wav")
-    
-    def _perform_speech_recognition(self, wav_file_path: str, language: str) -> str:
-        """Perform speech recognition on WAV file"""
-        with sr.AudioFile(wav_file_path) as source:
-            # Adjust for ambient noise
-            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            # Record the audio
+    def _perform_speech_recognition(self, wav_source: Union[str, BinaryIO], language: str) -> str:
+        """Perform speech recognition on a WAV file path or in-memory WAV buffer"""
+        with sr.AudioFile(wav_source) as source:
+            # No ambient noise calibration: the clip is already trimmed to speech, and
+            # calibrating on a file would consume (and drop) its first half second
             audio = self.recognizer.record(source)
         
-        try:
-            # Use Google Speech Recognition
-            text = self.recognizer.recognize_google(audio, language=language)
-            return text
-        
-        except sr.UnknownValueError:
-            logger.warning("Could not understand audio")
-            raise ValueError("Could not understand audio")
-        
-        except sr.RequestError as e:
-            logger.error(f"Speech recognition service error: {e}")
-            raise ValueError(f"Speech recognition service error: {e}")
+        return self.get_stt_engine(language).timed_transcribe(audio, language)
+    
+    def get_stt_engine(self, language: str) -> STTEngine:
+        """Speech recognition engine configured for a language"""
+        return self.stt_language_engines.get(language, self.stt_engine)
     
     async def text_to_speech(self, text: str, language: str = 'en') -> Optional[str]:
         """
@@ -124,30 +512,132 @@ class VoiceProcessor:
             
         Returns:
             Optional[str]: Path to generated audio file or None if failed
+            
+        Raises:
+            WorkerPoolBusyError: If the audio worker pools are saturated
         """
         try:
             # Create temporary file for audio output
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_audio:
+            suffix = f".{self.get_tts_engine(language).audio_format}"
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_audio:
                 audio_file_path = temp_audio.name
+                
+                cached_audio = await self._get_cached_audio(text, language)
+                if cached_audio is not None:
+                    temp_audio.write(cached_audio)
+                    return audio_file_path
             
-            # Generate TTS in a thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
+            # Generate TTS in the speech pool to avoid blocking
+            await self.speech_pool.run(
                 self._generate_tts,
                 text,
                 language,
                 audio_file_path
             )
             
+            if self.audio_cache is not None:
+                await asyncio.to_thread(self._cache_audio_file, self._audio_key(text, language), audio_file_path)
+            
             logger.info("Successfully generated TTS audio")
             return audio_file_path
         
+        except WorkerPoolBusyError:
+            os.unlink(audio_file_path)
+            raise
+        
         except Exception as e:
             logger.error(f"Error generating TTS: {e}")
             return None
     
+    async def text_to_speech_bytes(self, text: str, language: str = 'en') -> Optional[bytes]:
+        """
+        Convert text to speech entirely in memory.
+        
+        Args:
+            text (str): Text to convert to speech
+            language (str): Language code for TTS
+            
+        Returns:
+            Optional[bytes]: Audio in the engine's format (MP3 or OGG/Opus) or None if failed
+            
+        Raises:
+            WorkerPoolBusyError: If the audio worker pools are saturated
+        """
+        try:
+            cached_audio = await self._get_cached_audio(text, language)
+            if cached_audio is not None:
+                return cached_audio
+            
+            audio_data = await self.speech_pool.run(
+                self._generate_tts_bytes,
+                text,
+                language
+            )
+            
+            if self.audio_cache is not None:
+                await self.audio_cache.put_async(self._audio_key(text, language), audio_data)
+            
+            logger.info("Successfully generated TTS audio")
+            return audio_data
+        
+        except WorkerPoolBusyError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error generating TTS: {e}")
+            return None
+    
+    async def _get_cached_audio(self, text: str, language: str) -> Optional[bytes]:
+        """Previously synthesized audio for this text and language, if cached"""
+        if self.audio_cache is None:
+            return None
+        cached_audio = await self.audio_cache.get_async(self._audio_key(text, language))
+        if cached_audio is not None:
+            metrics.increment("cache_hits_total", cache="tts")
+            logger.info("Serving cached TTS audio")
+        else:
+            metrics.increment("cache_misses_total", cache="tts")
+        return cached_audio
+    
+    def get_cached_file_id(self, text: str, language: str) -> Optional[str]:
+        """Telegram file_id of an earlier upload of this text's audio, if any"""
+        if self.audio_cache is None:
+            return None
+        file_id = self.audio_cache.get_file_id(self._audio_key(text, language))
+        metrics.increment("cache_hits_total" if file_id else "cache_misses_total", cache="voice_file_id")
+        return file_id
+    
+    def _cache_audio_file(self, key: str, audio_file_path: str):
+        """Copy a synthesized audio file into the audio cache; runs off the event loop"""
+        with open(audio_file_path, 'rb') as f:
+            self.audio_cache.put(key, f.read())
+    
+    async def remember_file_id(self, text: str, language: str, file_id: str):
+        """Record the Telegram file_id of uploaded audio so repeats skip synthesis and upload"""
+        if self.audio_cache is not None:
+            await self.audio_cache.set_file_id_async(self._audio_key(text, language), file_id)
+    
+    def get_tts_engine(self, language: str) -> TTSEngine:
+        """Speech synthesis engine configured for a voice language"""
+        return self.tts_language_engines.get(language, self.tts_engine)
+    
+    def _audio_key(self, text: str, language: str) -> str:
+        """Cache key of synthesized audio; engines differ in voice, format and bitrate"""
+        return AudioCache.make_key(text, f"{language}:{self.get_tts_engine(language).variant}")
+    
     def _generate_tts(self, text: str, language: str, output_path: str):
-        """Generate TTS using gTTS"""
-        tts = gTTS(text=text, lang=language, slow=False)
-        tts.save(output_path)
+        """Generate TTS with the language's engine into a file"""
+        audio_data = self.get_tts_engine(language).timed_synthesize(text, language)
+        with open(output_path, 'wb') as f:
+            f.write(audio_data)
+    
+    def _generate_tts_bytes(self, text: str, language: str) -> bytes:
+        """Generate TTS with the language's engine into memory"""
+        return self.get_tts_engine(language).timed_synthesize(text, language)
+    
+    def close(self):
+        """Shut down the worker pools"""
+        self.transcode_pool.shutdown(wait=False)
+        self.speech_pool.shutdown(wait=False)
+        if self.tts_chunk_executor is not None:
+            self.tts_chunk_executor.shutdown(wait=False)
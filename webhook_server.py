@@ -0,0 +1,125 @@
+"""
+aiohttp webhook receiver that feeds Telegram updates into the bot's update queue.
+"""
+
+import asyncio
+import hmac
+import logging
+from typing import Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from update_processor import PerUserUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class WebhookServer:
+    def __init__(self, application: Application, listen: str = "0.0.0.0", port: int = 8443,
+                 url_path: str = "/telegram", secret_token: Optional[str] = None,
+                 max_pending_updates: Optional[int] = None):
+        """
+        Initialize the webhook HTTP server.
+
+        Args:
+            application (Application): Bot application whose update_queue receives updates
+            listen (str): Interface to bind
+            port (int): Port to bind
+            url_path (str): Path Telegram POSTs updates to
+            secret_token (str): Expected X-Telegram-Bot-Api-Secret-Token header, or None to skip the check
+            max_pending_updates (int): Queued plus unfinished updates before requests get a 503;
+                defaults to the update queue size plus the processor's concurrency limit
+        """
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.url_path = url_path
+        self.secret_token = secret_token
+        if max_pending_updates is None and application.update_queue.maxsize > 0:
+            processor = application.update_processor
+            concurrency = (processor.concurrency_limit if isinstance(processor, PerUserUpdateProcessor)
+                           else processor.max_concurrent_updates)
+            max_pending_updates = application.update_queue.maxsize + concurrency
+        self.max_pending_updates = max_pending_updates
+
+        self.received = 0
+        self.rejected = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def build_app(self) -> web.Application:
+        """Create the aiohttp application with webhook and health routes"""
+        app = web.Application()
+        app.router.add_post(self.url_path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Validate a webhook POST and enqueue the update without waiting for it to be processed"""
+        if self.secret_token is not None:
+            supplied = request.headers.get(SECRET_TOKEN_HEADER, "")
+            if not hmac.compare_digest(supplied, self.secret_token):
+                logger.warning("Rejected webhook request with invalid secret token")
+                return web.Response(status=403)
+
+        # Anything that is not an update object gets a 400, so Telegram does not redeliver it
+        try:
+            data = await request.json()
+            if not isinstance(data, dict):
+                raise TypeError(f"expected a JSON object, got {type(data).__name__}")
+            update = Update.de_json(data, self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            # ValueError covers invalid JSON and bodies that are not UTF-8
+            logger.warning(f"Rejected malformed webhook update: {e}")
+            return web.Response(status=400)
+
+        # Telegram redelivers on non-2xx, so shed load instead of buffering without bound.
+        # The application drains update_queue straight into tasks, so count those as well.
+        pending = pending_updates(self.application)
+        if self.max_pending_updates is not None and pending >= self.max_pending_updates:
+            return self._reject(f"{pending} updates pending")
+        try:
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            return self._reject("update queue full")
+
+        self.received += 1
+        return web.Response()
+
+    def _reject(self, reason: str) -> web.Response:
+        """Answer 503 so Telegram retries the update later"""
+        self.rejected += 1
+        logger.warning(f"Shedding webhook update ({reason}), asking Telegram to retry later")
+        return web.Response(status=503)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Liveness probe with queue depth"""
+        return web.json_response({
+            "running": self.application.running,
+            "queued_updates": self.application.update_queue.qsize(),
+            "pending_updates": pending_updates(self.application),
+            "received": self.received,
+            "rejected": self.rejected
+        })
+
+    async def start(self):
+        """Start accepting webhook requests"""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.url_path}")
+
+    async def stop(self):
+        """Stop accepting requests; updates already queued are left for the application to drain"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def pending_updates(application: Application) -> int:
+    """Updates waiting in update_queue plus those admitted by the processor but not finished"""
+    pending = application.update_queue.qsize()
+    if isinstance(application.update_processor, PerUserUpdateProcessor):
+        pending += application.update_processor.pending_updates
+    return pending
@@ -0,0 +1,79 @@
+"""
+Bounded worker pools for blocking and CPU-bound work.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+class WorkerPoolBusyError(RuntimeError):
+    """Raised when a pool already has its maximum number of queued jobs"""
+
+class BoundedExecutor:
+    def __init__(self, name: str, executor: Executor, max_pending: int):
+        """
+        Wrap an executor with a limit on queued plus running jobs.
+
+        Args:
+            name (str): Pool name used in logs and errors
+            executor (Executor): Underlying thread or process pool
+            max_pending (int): Jobs allowed in flight before submissions are rejected
+        """
+        self.name = name
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = Lock()  # pending is released from pool threads
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run func(*args) on the pool, rejecting the job if the pool is saturated.
+
+        Raises:
+            WorkerPoolBusyError: If max_pending jobs are already queued or running
+        """
+        with self.lock:
+            saturated = self.pending >= self.max_pending
+            if not saturated:
+                self.pending += 1
+        if saturated:
+            logger.warning(f"Worker pool {self.name} is saturated ({self.pending} jobs pending)")
+            metrics.increment("worker_pool_rejections_total", pool=self.name)
+            raise WorkerPoolBusyError(f"Worker pool {self.name} is busy")
+
+        try:
+            future = self.executor.submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        # Release the slot when the job itself finishes, not when the awaiting coroutine
+        # is cancelled: a job that already started keeps running in the pool
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Optional[Future] = None):
+        """Free a job slot"""
+        with self.lock:
+            self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        """Stop the underlying executor"""
+        self.executor.shutdown(wait=wait)
+
+def create_thread_pool(name: str, workers: int, max_pending: int) -> BoundedExecutor:
+    """Create a bounded thread pool for network-bound blocking calls"""
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+    return BoundedExecutor(name, executor, max_pending)
+
+def create_process_pool(name: str, workers: int, max_pending: int) -> BoundedExecutor:
+    """Create a bounded process pool for CPU-bound work; jobs must be picklable"""
+    # spawn avoids forking a parent that already runs the event loop and HTTP client threads
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return BoundedExecutor(name, executor, max_pending)